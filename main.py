@@ -17,7 +17,7 @@ from linebot.aiohttp_async_http_client import AiohttpAsyncHttpClient
 from linebot import AsyncLineBotApi, WebhookParser
 
 # Import handlers and services
-from vibpath_bot.utils.line_utils import set_line_bot_api
+from vibpath_bot.utils.line_utils import set_line_bot_api, set_http_session
 from vibpath_bot.handlers.webhook_handler import WebhookHandler
 from vibpath_bot.api.user_preferences_api import router as user_preferences_router
 from vibpath_bot.config.env_config import settings
@@ -39,8 +39,9 @@ async def lifespan(app: FastAPI):
     async_http_client = AiohttpAsyncHttpClient(session)
     line_bot_api = AsyncLineBotApi(settings.channel_access_token, async_http_client)
 
-    # Set LINE Bot API instance for utilities
+    # Set LINE Bot API instance and shared HTTP session for utilities
     set_line_bot_api(line_bot_api)
+    set_http_session(session)
 
     # Initialize webhook handler
     webhook_handler = WebhookHandler(line_bot_api)
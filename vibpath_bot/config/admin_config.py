@@ -7,6 +7,15 @@ from zoneinfo import ZoneInfo
 import re
 import os
 
+# Exact-match keywords for the admin help command
+HELP_COMMANDS = frozenset({'指令', 'commands', 'admin'})
+
+# Pause duration with its unit, e.g. 暫停15分鐘 / 暫停15m / 暫停2小時 / 暫停2h.
+# Alternatives keep the original precedence; minute units come first.
+PAUSE_DURATION_PATTERN = re.compile(
+    r'暫停\s*(\d+)\s*(分鐘?|mins?|m(?!in)|小時?|hours?|hrs?|h(?!our|r))'
+)
+
 
 class AdminConfig:
     """Manages admin users and bot pause state"""
@@ -21,7 +30,7 @@ class AdminConfig:
             separator = "|"
         else:
             separator = ","
-        self.admin_users = set(
+        self.admin_users = frozenset(
             uid.strip() for uid in admin_ids_str.split(separator) if uid.strip()
         )
 
@@ -119,22 +128,12 @@ class AdminConfig:
         if text == '暫停':
             return 60
 
-        # Parse duration with regex - support various formats
-        patterns = [
-            (r'暫停\s*(\d+)\s*分鐘?', 1),           # 分鐘/分
-            (r'暫停\s*(\d+)\s*mins?', 1),           # min/mins
-            (r'暫停\s*(\d+)\s*m(?!in)', 1),         # m (but not min)
-            (r'暫停\s*(\d+)\s*小時?', 60),          # 小時/小
-            (r'暫停\s*(\d+)\s*hours?', 60),         # hour/hours
-            (r'暫停\s*(\d+)\s*hrs?', 60),           # hr/hrs
-            (r'暫停\s*(\d+)\s*h(?!our|r)', 60),     # h (but not hour/hr)
-        ]
-
-        for pattern, multiplier in patterns:
-            match = re.match(pattern, text)
-            if match:
-                duration = int(match.group(1))
-                return duration * multiplier
+        # Parse duration with the precompiled pattern
+        match = PAUSE_DURATION_PATTERN.match(text)
+        if match:
+            duration = int(match.group(1))
+            # 分/m units are minutes, 小/h units are hours
+            return duration * (1 if match.group(2)[0] in '分m' else 60)
 
         # If no pattern matches, return default
         return 60
@@ -163,9 +162,7 @@ class AdminConfig:
         Returns:
             bool: True if it's a help command
         """
-        text = text.strip().lower()
-        help_keywords = ['指令', 'commands', 'admin']
-        return any(keyword == text for keyword in help_keywords)
+        return text.strip().lower() in HELP_COMMANDS
 
     def get_admin_help_message(self) -> str:
         """Get admin help message"""
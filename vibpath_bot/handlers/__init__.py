@@ -1,5 +1,5 @@
 """Handlers module for LINE Bot message and event processing"""
 
-from .message_handler import MessageHandler
+from .message_handler import MessageHandler, message_handler
 
-__all__ = ["MessageHandler"]
\ No newline at end of file
+__all__ = ["MessageHandler", "message_handler"]
\ No newline at end of file
@@ -5,7 +5,8 @@ Handles user interactions from Flex Messages, Quick Replies, and Rich Menus.
 import logging
 from typing import Dict, Any, Optional, Callable
 from urllib.parse import parse_qs
-from linebot.models import PostbackEvent, MessageEvent, FollowEvent, UnfollowEvent
+from linebot.models import PostbackEvent, MessageEvent, FollowEvent, UnfollowEvent, TextSendMessage
+from .quick_reply import QuickReplyTemplates
 
 logger = logging.getLogger(__name__)
 
@@ -144,7 +145,6 @@ class DefaultActionHandlers:
             response_text = f"📊 {city} {date} 的詳細天氣資訊\n\n⏰ 這個功能正在開發中..."
 
             # Reply with text message
-            from linebot.models import TextSendMessage
             reply_msg = TextSendMessage(text=response_text)
             await self.line_bot_api.reply_message(event.reply_token, reply_msg)
 
@@ -175,7 +175,6 @@ class DefaultActionHandlers:
             response_text = f"⭐ 感謝您的評分：{rating} 星！\n您的意見對我們很重要。"
 
             # Reply with text message
-            from linebot.models import TextSendMessage
             reply_msg = TextSendMessage(text=response_text)
             await self.line_bot_api.reply_message(event.reply_token, reply_msg)
 
@@ -199,9 +198,6 @@ class DefaultActionHandlers:
         """
         try:
             # Send location sharing request
-            from linebot.models import TextSendMessage
-            from .quick_reply import QuickReplyTemplates
-
             reply_msg = TextSendMessage(
                 text="📍 請選擇您要查詢天氣的方式：",
                 quick_reply=QuickReplyTemplates.location_sharing()
@@ -237,7 +233,6 @@ class DefaultActionHandlers:
                 response_text = "🤔 未知的確認狀態。"
 
             # Reply with text message
-            from linebot.models import TextSendMessage
             reply_msg = TextSendMessage(text=response_text)
             await self.line_bot_api.reply_message(event.reply_token, reply_msg)
 
@@ -265,9 +260,6 @@ class DefaultActionHandlers:
             response_text = "🤖 抱歉，我不理解這個操作。\n請使用選單或輸入文字與我對話。"
 
             # Reply with text message and main menu
-            from linebot.models import TextSendMessage
-            from .quick_reply import QuickReplyTemplates
-
             reply_msg = TextSendMessage(
                 text=response_text,
                 quick_reply=QuickReplyTemplates.main_menu()
@@ -3,22 +3,48 @@ LINE Bot message handler for different types of responses.
 Handles text, flex messages, quick replies, and other LINE-specific features.
 """
 import logging
+import re
 from typing import Union, List
 from linebot.models import TextSendMessage, FlexSendMessage
 from ..templates.flex_templates import FlexMessageTemplates
 from ..templates.custom_templates import BusinessTemplates
-from .quick_reply import QuickReplyTemplates
+from ..templates.bubble_templates import BubbleTemplates
+from .quick_reply import QUICK_REPLY_BASIC, QUICK_REPLY_PRODUCTS
 from ..config.keywords_config import keywords_config
 
 logger = logging.getLogger(__name__)
 
+# Keyword patterns in order of specificity, compiled once from keywords_config
+_KEYWORD_PATTERNS = tuple(
+    (message_type, re.compile("|".join(map(re.escape, keywords)), re.IGNORECASE))
+    for message_type, keywords in (
+        ('manual', keywords_config.manual_keywords),
+        ('frequency', keywords_config.product_keywords),
+        ('business', keywords_config.company_keywords),
+        ('menu', keywords_config.menu_keywords),
+        ('help', keywords_config.help_keywords),
+    )
+)
+
+_FLEX_MESSAGE_TYPES = frozenset({'menu', 'error', 'frequency', 'business', 'manual'})
+
+WELCOME_TEXT_MESSAGE = TextSendMessage(
+    text="👋 您好！歡迎使用 VibPath 智能客服！\n\n我是 AI 客服阿弦，可以為您介紹產品、公司資訊或顯示服務選單。\n\n💡 提醒：若不需要 AI 回覆，可點選下方「🤖 AI開關」或輸入「AI開關」來開啟/關閉。"
+)
+
+# Template classes are stateless, so every handler shares one instance of each
+_FLEX_TEMPLATES = FlexMessageTemplates()
+_BUSINESS_TEMPLATES = BusinessTemplates()
+
 
 class MessageHandler:
     """Handles different types of LINE Bot messages and responses"""
 
-    def __init__(self):
-        self.flex_templates = FlexMessageTemplates()
-        self.business_templates = BusinessTemplates()
+    # Stateless: shared templates live on the class, instances carry no state
+    __slots__ = ()
+
+    flex_templates = _FLEX_TEMPLATES
+    business_templates = _BUSINESS_TEMPLATES
 
 
     def create_service_menu(self) -> FlexSendMessage:
@@ -53,39 +79,16 @@ class MessageHandler:
         Returns:
             List of LINE messages
         """
-        messages = [
-            TextSendMessage(
-                text="👋 您好！歡迎使用 VibPath 智能客服！\n\n我是 AI 客服阿弦，可以為您介紹產品、公司資訊或顯示服務選單。\n\n💡 提醒：若不需要 AI 回覆，可點選下方「🤖 AI開關」或輸入「AI開關」來開啟/關閉。"
-            ),
-            self.create_service_menu()
-        ]
-        return messages
+        return [WELCOME_TEXT_MESSAGE, self.create_service_menu()]
 
 
     def create_quick_reply_basic(self):
         """Create basic quick reply with general options."""
-        return QuickReplyTemplates.custom_quick_reply([
-            {"label": "🏢 公司介紹", "action": "postback", "value": "show_company_intro"},
-            {"label": "🛒 查看產品", "action": "postback", "value": "show_frequency_products"},
-            {"label": "📋 選單", "action": "postback", "value": "show_service_menu"},
-            {"label": "🤖 AI開關", "action": "postback", "value": "toggle_ai_reply"},
-            {"label": "📖 更多產品", "action": "postback", "value": "show_product_details"},
-        ])
+        return QUICK_REPLY_BASIC
 
     def create_quick_reply_products(self):
         """Create product-focused quick reply."""
-        return QuickReplyTemplates.custom_quick_reply([
-            {"label": "🎵 商品原理", "action": "postback", "value": "explain_frequency"},
-            {"label": "🌍 舒曼波", "action": "postback", "value": "explain_7_83hz"},
-            {"label": "🕉️ 13頻脈輪", "action": "postback", "value": "explain_13Freq"},
-            {"label": "⚡ γ波40Hz", "action": "postback", "value": "explain_40hz"},
-            {"label": "🔄 α/θ雙頻", "action": "postback", "value": "explain_double_freq"},
-            {"label": "🔧 客製頻率", "action": "postback", "value": "explain_pulse_gen"},
-            {"label": "🎛️ 複合式頻率", "action": "postback", "value": "explain_composite_freq"},
-            {"label": "🎚️ 十頻儀", "action": "postback", "value": "explain_ten_freq"},
-            {"label": "🤖 AI開關", "action": "postback", "value": "toggle_ai_reply"},
-            {"label": "◀️ 返回基本", "action": "postback", "value": "show_basic_menu"},
-        ])
+        return QUICK_REPLY_PRODUCTS
 
     def create_help_message(self) -> TextSendMessage:
         """
@@ -116,7 +119,7 @@ class MessageHandler:
 
         return TextSendMessage(
             text=help_text,
-            quick_reply=self.create_quick_reply_basic()
+            quick_reply=QUICK_REPLY_BASIC
         )
 
     def create_frequency_services_carousel(self, request_host: str = None) -> FlexSendMessage:
@@ -153,7 +156,6 @@ class MessageHandler:
         Returns:
             FlexSendMessage: Manual download carousel with all manual cards
         """
-        from ..templates.bubble_templates import BubbleTemplates
         return FlexSendMessage(
             alt_text="產品手冊下載",
             contents=BubbleTemplates.build_manual_carousel()
@@ -170,19 +172,15 @@ class MessageHandler:
         Returns:
             str: Message type ('menu', 'help', 'frequency', 'business', 'manual', 'general')
         """
-        # Check keywords in order of specificity
-        if keywords_config.contains_manual_keyword(text):
-            return 'manual'
-        if keywords_config.contains_product_keyword(text):
-            return 'frequency'
-        if keywords_config.contains_company_keyword(text):
-            return 'business'
-        if keywords_config.contains_menu_keyword(text):
-            return 'menu'
-        if keywords_config.contains_help_keyword(text):
-            return 'help'
+        for message_type, pattern in _KEYWORD_PATTERNS:
+            if pattern.search(text):
+                return message_type
         return 'general'
 
     def should_use_flex_message(self, message_type: str) -> bool:
         """Determine whether to use Flex Message for response."""
-        return message_type in {'menu', 'error', 'frequency', 'business', 'manual'}
+        return message_type in _FLEX_MESSAGE_TYPES
+
+
+# Default message handler instance
+message_handler = MessageHandler()
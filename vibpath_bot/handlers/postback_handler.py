@@ -3,22 +3,38 @@ Postback event handler for LINE Bot.
 Handles postback actions from buttons and manages explanation responses.
 """
 import logging
+from types import MappingProxyType
 from typing import Dict, Any, Optional
 from linebot.models import TextSendMessage, FlexSendMessage, QuickReply
+from ..templates.custom_templates import BusinessTemplates
+from ..templates.flex_templates import FlexMessageTemplates
+from .message_handler import message_handler
+from .quick_reply import QUICK_REPLY_BASIC, QUICK_REPLY_PRODUCTS
+from .ai_toggle_handler import ai_toggle_handler
 
 logger = logging.getLogger(__name__)
 
+# Static menu responses never change, so they are built once and shared
+PRODUCT_DETAILS_MESSAGE = TextSendMessage(
+    text="📖 產品詳細說明\n\n請選擇您想了解的產品：",
+    quick_reply=QUICK_REPLY_PRODUCTS
+)
+BASIC_MENU_MESSAGE = TextSendMessage(
+    text="◀️ 返回基本選單",
+    quick_reply=QUICK_REPLY_BASIC
+)
 
-class PostbackHandler:
-    """Handles postback events and explanation responses"""
 
-    def __init__(self):
-        self.explanations = self._initialize_explanations()
+# Technical-feature bullets shared verbatim by several product explanations
+_WAVEFORM_FIELD_LINES = (
+    "• 波形都很漂亮，總諧波失真度都很低\n"
+    "• 磁場強度都很足，能發揮更好效果，同時皆符合國家(極)低頻電磁波暴露規範"
+)
+_TECH_FEATURES = "⚡ 技術特色：\n" + _WAVEFORM_FIELD_LINES
 
-    def _initialize_explanations(self) -> Dict[str, str]:
-        """Initialize explanation content (you can modify these later)"""
-        return {
-            "explain_company": """🏢 VibPath 商品中心
+# Explanation content shared by every handler instance (you can modify these later)
+_EXPLANATIONS: Dict[str, str] = {
+    "explain_company": """🏢 VibPath 商品中心
 
 我們是專業的商品設備製造商，專精於極低頻電磁波技術，致力於為客戶提供高品質的商品體驗。
 
@@ -42,7 +58,7 @@ class PostbackHandler:
 
 📞 歡迎體驗我們的專業產品，感受高品質商品的神奇力量！""",
 
-            "explain_frequency": """🎵 商品原理說明
+    "explain_frequency": f"""🎵 商品原理說明
 
 商品產品是運用特定的極低頻電磁波來調節身心狀態的自然方法。
 
@@ -54,8 +70,7 @@ class PostbackHandler:
 • γ波(40Hz)：提升記憶力與專注力，適合高效學習與思考時使用
 
 ⚡ 我們的技術特色：
-• 波形都很漂亮，總諧波失真度都很低
-• 磁場強度都很足，能發揮更好效果，同時皆符合國家(極)低頻電磁波暴露規範
+{_WAVEFORM_FIELD_LINES}
 • 每一台機器都經過精密調校
 • 不只修行人輔助好用，一般人用也都很好
 
@@ -67,7 +82,7 @@ class PostbackHandler:
 
 🌟 產品共同特點：波形純淨、失真度低、磁場強度足""",
 
-            "explain_7_83hz": """🎵 舒曼波 (7.83Hz)
+    "explain_7_83hz": f"""🎵 舒曼波 (7.83Hz)
 
 這是較大家一般所知的極低頻電磁波，一般是拿來作助眠使用。
 
@@ -75,14 +90,12 @@ class PostbackHandler:
 • α波(7.83-8Hz)：大腦靜下來後的狀態，幫助身心平衡、放鬆，助眠效果
 • 相對於7.83Hz，依我們的經驗，8Hz的效果更好，雖然差異僅0.17Hz
 
-⚡ 技術特色：
-• 波形都很漂亮，總諧波失真度都很低
-• 磁場強度都很足，能發揮更好效果，同時皆符合國家(極)低頻電磁波暴露規範
+{_TECH_FEATURES}
 • 每一台機器都經過精密調校
 
 🎯 適用：放鬆、助眠""",
 
-            "explain_13Freq": """🕉️ 13頻脈輪波
+    "explain_13Freq": """🕉️ 13頻脈輪波
 
 如其名，脈輪，屬於瑜珈的系統，對應從海底到頂輪。
 
@@ -97,7 +110,7 @@ class PostbackHandler:
 • 磁場強度都很足
 • 不只修行人輔助好用，一般人用也都很好""",
 
-            "explain_40hz": """⚡ γ波(GAMMA) 40Hz
+    "explain_40hz": f"""⚡ γ波(GAMMA) 40Hz
 
 這是人高度專注時大腦的腦波。
 
@@ -106,14 +119,12 @@ class PostbackHandler:
 • 適合高效學習與思考時使用
 • 期望誘發大腦的同步性
 
-⚡ 技術特色：
-• 波形都很漂亮，總諧波失真度都很低
-• 磁場強度都很足，能發揮更好效果，同時皆符合國家(極)低頻電磁波暴露規範
+{_TECH_FEATURES}
 • 不只修行人輔助好用，一般人用也都很好
 
 💡 在醫學上也有不少研究，您可以GOOGLE「MIT 40Hz」。""",
 
-            "explain_double_freq": """🔄 α/θ波
+    "explain_double_freq": f"""🔄 α/θ波
 
 🧠 雙頻說明：
 
@@ -125,12 +136,10 @@ class PostbackHandler:
 • 醒睡之間的腦波，比α波更積極的助眠作用
 • 修行時很好的輔助機器，幫助修行人修行時更容易進入更深的定靜狀態
 
-⚡ 技術特色：
-• 波形都很漂亮，總諧波失真度都很低
-• 磁場強度都很足，能發揮更好效果，同時皆符合國家(極)低頻電磁波暴露規範
+{_TECH_FEATURES}
 • 不只修行人輔助好用，一般人用也都很好""",
 
-            "explain_pulse_gen": """🔧 客製頻率 脈衝產生器
+    "explain_pulse_gen": """🔧 客製頻率 脈衝產生器
 
 程式修改客製頻率，目前已完成共11頻率可選：
 (選一個頻率進行燒寫，一台機器固定一個頻率，不能切換頻率)
@@ -163,7 +172,7 @@ class PostbackHandler:
 
 機器皆以舒曼波機重新編寫、燒錄新程式碼達成。""",
 
-            "explain_composite_freq": """🎛️ 複合式頻率產生器 (0.5Hz + 8.0Hz)
+    "explain_composite_freq": f"""🎛️ 複合式頻率產生器 (0.5Hz + 8.0Hz)
 
 同一台機器同時產出 0.5Hz 與 8.0Hz 兩組極低頻電磁波，複合式共振體驗。
 
@@ -172,16 +181,14 @@ class PostbackHandler:
 • 8.0Hz (Alpha Wave)：大腦靜下來後的狀態，放鬆、助眠、身心平衡
 • 兩頻同時作用，兼顧深層修復與身心平衡
 
-⚡ 技術特色：
-• 波形都很漂亮，總諧波失真度都很低
-• 磁場強度都很足，能發揮更好效果，同時皆符合國家(極)低頻電磁波暴露規範
+{_TECH_FEATURES}
 • 銅線加強版，磁場穩定
 • 每一台機器都經過精密調校
 
 🎯 適用：深層助眠、放鬆、修復共振
 """,
 
-            "explain_ten_freq": """🎚️ 十頻儀 (0.1Hz~136.1Hz)
+    "explain_ten_freq": """🎚️ 十頻儀 (0.1Hz~136.1Hz)
 
 PEMF 脈衝電磁場產生器強化版，一台機器整合 10 種頻率，側按切換鍵即時切換，OLED 螢幕顯示當前頻率資訊。
 
@@ -218,7 +225,45 @@ PEMF 脈衝電磁場產生器強化版，一台機器整合 10 種頻率，側
 
 🎯 適用：助眠、放鬆、專注提升、修行輔助、健康調理
 """
-        }
+}
+
+# Read-only view for callers; add_explanation writes to the process-global dict
+EXPLANATIONS = MappingProxyType(_EXPLANATIONS)
+
+# Product explanations reply with the product quick reply, the rest with the basic one
+_PRODUCT_EXPLANATION_KEYS = frozenset({
+    "explain_7_83hz", "explain_13Freq", "explain_40hz", "explain_double_freq",
+    "explain_pulse_gen", "explain_composite_freq", "explain_ten_freq", "explain_frequency",
+})
+
+
+def _build_explanation_message(key: str, content: str) -> TextSendMessage:
+    """Build an explanation reply with its matching quick reply attached"""
+    if key in _PRODUCT_EXPLANATION_KEYS:
+        quick_reply = QUICK_REPLY_PRODUCTS
+    else:
+        quick_reply = QUICK_REPLY_BASIC
+    return TextSendMessage(text=content, quick_reply=quick_reply)
+
+
+# Explanation text and quick replies are static, so each reply is built once
+_EXPLANATION_MESSAGES: Dict[str, TextSendMessage] = {
+    key: _build_explanation_message(key, content)
+    for key, content in _EXPLANATIONS.items() if content
+}
+
+NO_EXPLANATION_MESSAGE = TextSendMessage(text="抱歉，目前沒有相關說明資訊。請聯繫客服獲得更多幫助。")
+ERROR_MESSAGE = TextSendMessage(text="系統處理時發生錯誤，請稍後再試。")
+
+
+class PostbackHandler:
+    """Handles postback events and explanation responses"""
+
+    # Stateless: explanations and actions are shared at class/module level
+    __slots__ = ()
+
+    # Read-only view kept for callers that inspect handler.explanations
+    explanations = EXPLANATIONS
 
     def handle_postback(self, postback_data: str, user_id: str, request_host: str = None, with_quick_reply: bool = True):
         """
@@ -234,113 +279,94 @@ PEMF 脈衝電磁場產生器強化版，一台機器整合 10 種頻率，側
             TextSendMessage or FlexSendMessage: Response message with optional quick reply
         """
         try:
-            logger.info(f"Handling postback: {postback_data} for user: {user_id}")
+            logger.info("Handling postback: %s for user: %s", postback_data, user_id)
 
             # Special handlers for different UI actions
-            if postback_data == "toggle_ai_reply":
-                # Handle AI reply toggle from Rich Menu
-                from .ai_toggle_handler import ai_toggle_handler
-                return ai_toggle_handler.handle_toggle(user_id)
-
-            elif postback_data == "check_ai_status":
-                # Check AI reply status
-                from .ai_toggle_handler import ai_toggle_handler
-                return ai_toggle_handler.get_status(user_id)
-
-            elif postback_data == "show_product_details":
-                # Show product details menu with product quick reply
-                from .message_handler import MessageHandler
-                handler = MessageHandler()
-                return TextSendMessage(
-                    text="📖 產品詳細說明\n\n請選擇您想了解的產品：",
-                    quick_reply=handler.create_quick_reply_products()
-                )
-
-            elif postback_data == "show_basic_menu":
-                # Return to basic menu
-                from .message_handler import MessageHandler
-                handler = MessageHandler()
-                return TextSendMessage(
-                    text="◀️ 返回基本選單",
-                    quick_reply=handler.create_quick_reply_basic()
-                )
-
-            elif postback_data == "show_frequency_products":
-                # Import here to avoid circular import
-                from ..templates.custom_templates import BusinessTemplates
-                from .message_handler import MessageHandler
-
-                flex_msg = BusinessTemplates.frequency_services_carousel(request_host)
-                # Add quick reply to flex message
-                handler = MessageHandler()
-                flex_msg.quick_reply = handler.create_quick_reply_products()
-                return flex_msg
-
-            elif postback_data == "show_company_intro":
-                # Import here to avoid circular import
-                from ..templates.custom_templates import BusinessTemplates
-                from .message_handler import MessageHandler
-
-                flex_msg = BusinessTemplates.company_introduction_with_homepage(request_host)
-                # Add quick reply to flex message
-                handler = MessageHandler()
-                flex_msg.quick_reply = handler.create_quick_reply_basic()
-                return flex_msg
-
-            elif postback_data == "show_manual_download":
-                from .message_handler import MessageHandler
-                handler = MessageHandler()
-                flex_msg = handler.create_manual_download_card(request_host)
-                flex_msg.quick_reply = handler.create_quick_reply_basic()
-                return flex_msg
-
-            elif postback_data == "show_service_menu":
-                # Import here to avoid circular import
-                from ..templates.flex_templates import FlexMessageTemplates
-                from .message_handler import MessageHandler
-
-                flex_msg = FlexMessageTemplates.service_menu()
-                # Add quick reply to flex message
-                handler = MessageHandler()
-                flex_msg.quick_reply = handler.create_quick_reply_basic()
-                return flex_msg
-
-            explanation = self.explanations.get(postback_data)
-            if explanation:
-                if with_quick_reply:
-                    # Import here to avoid circular import
-                    from .message_handler import MessageHandler
-                    handler = MessageHandler()
-
-                    # Use product quick reply for product explanations
-                    product_postbacks = ["explain_7_83hz", "explain_13Freq", "explain_40hz", "explain_double_freq", "explain_pulse_gen", "explain_composite_freq", "explain_ten_freq", "explain_frequency"]
-                    if postback_data in product_postbacks:
-                        quick_reply = handler.create_quick_reply_products()
-                    else:
-                        quick_reply = handler.create_quick_reply_basic()
-
-                    message = TextSendMessage(text=explanation, quick_reply=quick_reply)
-                else:
-                    message = TextSendMessage(text=explanation)
-                return message
+            action = self._ACTIONS.get(postback_data)
+            if action:
+                return action(self, user_id, request_host)
+
+            if with_quick_reply:
+                message = _EXPLANATION_MESSAGES.get(postback_data)
+                if message:
+                    return message
             else:
-                return TextSendMessage(text="抱歉，目前沒有相關說明資訊。請聯繫客服獲得更多幫助。")
+                explanation = _EXPLANATIONS.get(postback_data)
+                if explanation:
+                    return TextSendMessage(text=explanation)
+            return NO_EXPLANATION_MESSAGE
 
         except Exception as e:
-            logger.error(f"Error handling postback {postback_data}: {e}")
-            return TextSendMessage(text="系統處理時發生錯誤，請稍後再試。")
+            logger.error("Error handling postback %s: %s", postback_data, e)
+            return ERROR_MESSAGE
+
+    def _toggle_ai_reply(self, user_id: str, request_host: str = None) -> TextSendMessage:
+        """Handle AI reply toggle from Rich Menu"""
+        return ai_toggle_handler.handle_toggle(user_id)
+
+    def _check_ai_status(self, user_id: str, request_host: str = None) -> TextSendMessage:
+        """Check AI reply status"""
+        return ai_toggle_handler.get_status(user_id)
+
+    def _show_product_details(self, user_id: str, request_host: str = None) -> TextSendMessage:
+        """Show product details menu with product quick reply"""
+        return PRODUCT_DETAILS_MESSAGE
+
+    def _show_basic_menu(self, user_id: str, request_host: str = None) -> TextSendMessage:
+        """Return to basic menu"""
+        return BASIC_MENU_MESSAGE
+
+    def _show_frequency_products(self, user_id: str, request_host: str = None) -> FlexSendMessage:
+        """Show product carousel with product quick reply"""
+        flex_msg = BusinessTemplates.frequency_services_carousel(request_host)
+        flex_msg.quick_reply = QUICK_REPLY_PRODUCTS
+        return flex_msg
+
+    def _show_company_intro(self, user_id: str, request_host: str = None) -> FlexSendMessage:
+        """Show company introduction with basic quick reply"""
+        flex_msg = BusinessTemplates.company_introduction_with_homepage(request_host)
+        flex_msg.quick_reply = QUICK_REPLY_BASIC
+        return flex_msg
+
+    def _show_manual_download(self, user_id: str, request_host: str = None) -> FlexSendMessage:
+        """Show manual download card with basic quick reply"""
+        flex_msg = message_handler.create_manual_download_card(request_host)
+        flex_msg.quick_reply = QUICK_REPLY_BASIC
+        return flex_msg
+
+    def _show_service_menu(self, user_id: str, request_host: str = None) -> FlexSendMessage:
+        """Show service menu with basic quick reply"""
+        flex_msg = FlexMessageTemplates.service_menu()
+        flex_msg.quick_reply = QUICK_REPLY_BASIC
+        return flex_msg
+
+    # Postback data -> action function(self, user_id, request_host)
+    _ACTIONS = {
+        "toggle_ai_reply": _toggle_ai_reply,
+        "check_ai_status": _check_ai_status,
+        "show_product_details": _show_product_details,
+        "show_basic_menu": _show_basic_menu,
+        "show_frequency_products": _show_frequency_products,
+        "show_company_intro": _show_company_intro,
+        "show_manual_download": _show_manual_download,
+        "show_service_menu": _show_service_menu,
+    }
 
     def add_explanation(self, key: str, content: str):
-        """Add or update explanation content"""
-        self.explanations[key] = content
+        """Add or update explanation content (process-global)"""
+        _EXPLANATIONS[key] = content
+        if content:
+            _EXPLANATION_MESSAGES[key] = _build_explanation_message(key, content)
+        else:
+            _EXPLANATION_MESSAGES.pop(key, None)
 
     def get_explanation(self, key: str) -> Optional[str]:
         """Get explanation content by key"""
-        return self.explanations.get(key)
+        return _EXPLANATIONS.get(key)
 
     def list_available_explanations(self) -> list:
         """List all available explanation keys"""
-        return list(self.explanations.keys())
+        return list(_EXPLANATIONS)
 
 
 # Default postback handler instance
@@ -2,6 +2,7 @@
 Quick Reply utilities for LINE Bot.
 Provides various quick reply templates for different scenarios.
 """
+from functools import lru_cache
 from typing import List, Dict, Any, Optional
 from linebot.models import (
     QuickReply, QuickReplyButton, MessageAction, PostbackAction,
@@ -9,6 +10,112 @@ from linebot.models import (
 )
 
 
+# Static quick reply layouts, built once at import and shared by every caller
+_WEATHER_CITIES = [
+    {"name": "台北", "emoji": "🏙️"},
+    {"name": "高雄", "emoji": "🌃"},
+    {"name": "台中", "emoji": "🏢"},
+    {"name": "東京", "emoji": "🗼"},
+    {"name": "首爾", "emoji": "🏰"},
+    {"name": "新加坡", "emoji": "🏖️"},
+    {"name": "倫敦", "emoji": "🎡"},
+    {"name": "紐約", "emoji": "🗽"},
+    {"name": "巴黎", "emoji": "🗼"},
+    {"name": "其他城市", "emoji": "🌍"}
+]
+
+_WEATHER_CITIES_QR = QuickReply(items=[
+    QuickReplyButton(
+        action=MessageAction(
+            label=f"{city['emoji']} {city['name']}",
+            # Special button for custom city input
+            text="請輸入城市名稱" if city["name"] == "其他城市" else f"{city['name']}天氣"
+        )
+    )
+    for city in _WEATHER_CITIES
+])
+
+_MAIN_MENU_QR = QuickReply(items=[
+    QuickReplyButton(action=MessageAction(label=item["label"], text=item["text"]))
+    for item in [
+        {"label": "🌤️ 天氣查詢", "text": "天氣查詢"},
+        {"label": "📋 服務選單", "text": "選單"},
+        {"label": "❓ 使用說明", "text": "幫助"},
+        {"label": "💬 智能對話", "text": "你好"}
+    ]
+])
+
+_YES_NO_CONFIRMATION_QR = QuickReply(items=[
+    QuickReplyButton(
+        action=PostbackAction(
+            label="✅ 是",
+            data="action=confirm&value=yes"
+        )
+    ),
+    QuickReplyButton(
+        action=PostbackAction(
+            label="❌ 否",
+            data="action=confirm&value=no"
+        )
+    )
+])
+
+_LOCATION_SHARING_QR = QuickReply(items=[
+    QuickReplyButton(
+        action=LocationAction(label="📍 分享位置")
+    ),
+    QuickReplyButton(
+        action=MessageAction(
+            label="✏️ 手動輸入",
+            text="請輸入城市名稱"
+        )
+    ),
+    QuickReplyButton(
+        action=MessageAction(
+            label="🌍 熱門城市",
+            text="熱門城市"
+        )
+    )
+])
+
+_ERROR_RECOVERY_QR = QuickReply(items=[
+    QuickReplyButton(
+        action=MessageAction(
+            label="🔄 重試",
+            text="重試"
+        )
+    ),
+    QuickReplyButton(
+        action=MessageAction(
+            label="🏠 回主選單",
+            text="選單"
+        )
+    ),
+    QuickReplyButton(
+        action=MessageAction(
+            label="❓ 說明",
+            text="幫助"
+        )
+    )
+])
+
+_FEEDBACK_OPTIONS_QR = QuickReply(items=[
+    QuickReplyButton(
+        action=PostbackAction(
+            label=label,
+            data=f"action=feedback&rating={rating}"
+        )
+    )
+    for label, rating in [
+        ("⭐⭐⭐⭐⭐ 很好", 5),
+        ("⭐⭐⭐⭐ 不錯", 4),
+        ("⭐⭐⭐ 普通", 3),
+        ("⭐⭐ 不佳", 2),
+        ("⭐ 很差", 1)
+    ]
+])
+
+
 class QuickReplyTemplates:
     """Collection of Quick Reply templates for different use cases"""
 
@@ -20,42 +127,7 @@ class QuickReplyTemplates:
         Returns:
             QuickReply: Weather cities quick reply
         """
-        cities = [
-            {"name": "台北", "emoji": "🏙️"},
-            {"name": "高雄", "emoji": "🌃"},
-            {"name": "台中", "emoji": "🏢"},
-            {"name": "東京", "emoji": "🗼"},
-            {"name": "首爾", "emoji": "🏰"},
-            {"name": "新加坡", "emoji": "🏖️"},
-            {"name": "倫敦", "emoji": "🎡"},
-            {"name": "紐約", "emoji": "🗽"},
-            {"name": "巴黎", "emoji": "🗼"},
-            {"name": "其他城市", "emoji": "🌍"}
-        ]
-
-        quick_reply_buttons = []
-        for city in cities:
-            if city["name"] == "其他城市":
-                # Special button for custom city input
-                quick_reply_buttons.append(
-                    QuickReplyButton(
-                        action=MessageAction(
-                            label=f"{city['emoji']} {city['name']}",
-                            text="請輸入城市名稱"
-                        )
-                    )
-                )
-            else:
-                quick_reply_buttons.append(
-                    QuickReplyButton(
-                        action=MessageAction(
-                            label=f"{city['emoji']} {city['name']}",
-                            text=f"{city['name']}天氣"
-                        )
-                    )
-                )
-
-        return QuickReply(items=quick_reply_buttons)
+        return _WEATHER_CITIES_QR
 
     @staticmethod
     def main_menu() -> QuickReply:
@@ -65,25 +137,7 @@ class QuickReplyTemplates:
         Returns:
             QuickReply: Main menu options
         """
-        menu_items = [
-            {"label": "🌤️ 天氣查詢", "text": "天氣查詢"},
-            {"label": "📋 服務選單", "text": "選單"},
-            {"label": "❓ 使用說明", "text": "幫助"},
-            {"label": "💬 智能對話", "text": "你好"}
-        ]
-
-        quick_reply_buttons = []
-        for item in menu_items:
-            quick_reply_buttons.append(
-                QuickReplyButton(
-                    action=MessageAction(
-                        label=item["label"],
-                        text=item["text"]
-                    )
-                )
-            )
-
-        return QuickReply(items=quick_reply_buttons)
+        return _MAIN_MENU_QR
 
     @staticmethod
     def yes_no_confirmation() -> QuickReply:
@@ -93,27 +147,14 @@ class QuickReplyTemplates:
         Returns:
             QuickReply: Yes/No options
         """
-        quick_reply_buttons = [
-            QuickReplyButton(
-                action=PostbackAction(
-                    label="✅ 是",
-                    data="action=confirm&value=yes"
-                )
-            ),
-            QuickReplyButton(
-                action=PostbackAction(
-                    label="❌ 否",
-                    data="action=confirm&value=no"
-                )
-            )
-        ]
-
-        return QuickReply(items=quick_reply_buttons)
+        return _YES_NO_CONFIRMATION_QR
 
     @staticmethod
+    @lru_cache(maxsize=256)
     def weather_actions(city: str) -> QuickReply:
         """
         Weather-related action buttons for a specific city.
+        Cached per city since only a handful of city names appear.
 
         Args:
             city: City name
@@ -161,25 +202,7 @@ class QuickReplyTemplates:
         Returns:
             QuickReply: Location sharing options
         """
-        quick_reply_buttons = [
-            QuickReplyButton(
-                action=LocationAction(label="📍 分享位置")
-            ),
-            QuickReplyButton(
-                action=MessageAction(
-                    label="✏️ 手動輸入",
-                    text="請輸入城市名稱"
-                )
-            ),
-            QuickReplyButton(
-                action=MessageAction(
-                    label="🌍 熱門城市",
-                    text="熱門城市"
-                )
-            )
-        ]
-
-        return QuickReply(items=quick_reply_buttons)
+        return _LOCATION_SHARING_QR
 
     @staticmethod
     def error_recovery() -> QuickReply:
@@ -189,28 +212,7 @@ class QuickReplyTemplates:
         Returns:
             QuickReply: Error recovery options
         """
-        quick_reply_buttons = [
-            QuickReplyButton(
-                action=MessageAction(
-                    label="🔄 重試",
-                    text="重試"
-                )
-            ),
-            QuickReplyButton(
-                action=MessageAction(
-                    label="🏠 回主選單",
-                    text="選單"
-                )
-            ),
-            QuickReplyButton(
-                action=MessageAction(
-                    label="❓ 說明",
-                    text="幫助"
-                )
-            )
-        ]
-
-        return QuickReply(items=quick_reply_buttons)
+        return _ERROR_RECOVERY_QR
 
     @staticmethod
     def feedback_options() -> QuickReply:
@@ -220,40 +222,7 @@ class QuickReplyTemplates:
         Returns:
             QuickReply: Feedback options
         """
-        quick_reply_buttons = [
-            QuickReplyButton(
-                action=PostbackAction(
-                    label="⭐⭐⭐⭐⭐ 很好",
-                    data="action=feedback&rating=5"
-                )
-            ),
-            QuickReplyButton(
-                action=PostbackAction(
-                    label="⭐⭐⭐⭐ 不錯",
-                    data="action=feedback&rating=4"
-                )
-            ),
-            QuickReplyButton(
-                action=PostbackAction(
-                    label="⭐⭐⭐ 普通",
-                    data="action=feedback&rating=3"
-                )
-            ),
-            QuickReplyButton(
-                action=PostbackAction(
-                    label="⭐⭐ 不佳",
-                    data="action=feedback&rating=2"
-                )
-            ),
-            QuickReplyButton(
-                action=PostbackAction(
-                    label="⭐ 很差",
-                    data="action=feedback&rating=1"
-                )
-            )
-        ]
-
-        return QuickReply(items=quick_reply_buttons)
+        return _FEEDBACK_OPTIONS_QR
 
     @staticmethod
     def custom_quick_reply(items: List[Dict[str, Any]]) -> QuickReply:
@@ -286,4 +255,27 @@ class QuickReplyTemplates:
 
             quick_reply_buttons.append(QuickReplyButton(action=action))
 
-        return QuickReply(items=quick_reply_buttons)
\ No newline at end of file
+        return QuickReply(items=quick_reply_buttons)
+
+
+# Quick reply layouts are static, so build them once and share the instances
+QUICK_REPLY_BASIC = QuickReplyTemplates.custom_quick_reply([
+    {"label": "🏢 公司介紹", "action": "postback", "value": "show_company_intro"},
+    {"label": "🛒 查看產品", "action": "postback", "value": "show_frequency_products"},
+    {"label": "📋 選單", "action": "postback", "value": "show_service_menu"},
+    {"label": "🤖 AI開關", "action": "postback", "value": "toggle_ai_reply"},
+    {"label": "📖 更多產品", "action": "postback", "value": "show_product_details"},
+])
+
+QUICK_REPLY_PRODUCTS = QuickReplyTemplates.custom_quick_reply([
+    {"label": "🎵 商品原理", "action": "postback", "value": "explain_frequency"},
+    {"label": "🌍 舒曼波", "action": "postback", "value": "explain_7_83hz"},
+    {"label": "🕉️ 13頻脈輪", "action": "postback", "value": "explain_13Freq"},
+    {"label": "⚡ γ波40Hz", "action": "postback", "value": "explain_40hz"},
+    {"label": "🔄 α/θ雙頻", "action": "postback", "value": "explain_double_freq"},
+    {"label": "🔧 客製頻率", "action": "postback", "value": "explain_pulse_gen"},
+    {"label": "🎛️ 複合式頻率", "action": "postback", "value": "explain_composite_freq"},
+    {"label": "🎚️ 十頻儀", "action": "postback", "value": "explain_ten_freq"},
+    {"label": "🤖 AI開關", "action": "postback", "value": "toggle_ai_reply"},
+    {"label": "◀️ 返回基本", "action": "postback", "value": "show_basic_menu"},
+])
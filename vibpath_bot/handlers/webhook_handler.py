@@ -2,18 +2,37 @@
 Webhook Event Handler
 Handles LINE webhook events (message, postback, follow)
 """
+import asyncio
+import logging
 from linebot.models import MessageEvent, PostbackEvent, FollowEvent, TextSendMessage, FlexSendMessage
 from linebot import AsyncLineBotApi
+from linebot.exceptions import LineBotApiError
 from vibpath_bot.utils.line_utils import before_reply_display_loading_animation
-from vibpath_bot.handlers.message_handler import MessageHandler
+from vibpath_bot.handlers.message_handler import message_handler
+from vibpath_bot.handlers.quick_reply import QUICK_REPLY_BASIC, QUICK_REPLY_PRODUCTS
 from vibpath_bot.handlers.postback_handler import postback_handler
 from vibpath_bot.handlers.ai_toggle_handler import ai_toggle_handler
-from vibpath_bot.config.admin_config import admin_config
+from vibpath_bot.config.admin_config import admin_config, HELP_COMMANDS
 from vibpath_bot.services.user_preference_service import user_preference_service
 from vibpath_bot.services.ai_agent_service import ai_agent_service
+from vibpath_bot.utils.user_cache import user_preferences_cache
 from vibpath_bot.utils.logger import webhook_logger as logger
 from vibpath_bot.utils.exceptions import AIAgentError
 
+# LINE reply API accepts at most five messages per call
+MAX_REPLY_MESSAGES = 5
+
+# Error message LINE returns when the reply token is expired or already used
+INVALID_REPLY_TOKEN = "Invalid reply token"
+
+# Text commands, matched against the stripped and lower-cased message
+AI_TOGGLE_COMMANDS = frozenset({'ai開關', 'ai設定'})
+AI_STATUS_COMMANDS = frozenset({'ai狀態', 'ai status'})
+ADMIN_STATUS_COMMANDS = frozenset({'狀態', 'status'})
+
+# Postback actions that read or write MongoDB (blocking), so they run in a worker thread
+DB_POSTBACK_ACTIONS = frozenset({'toggle_ai_reply', 'check_ai_status'})
+
 
 class WebhookHandler:
     """Handler for LINE webhook events"""
@@ -26,7 +45,103 @@ class WebhookHandler:
             line_bot_api: LINE Bot API instance
         """
         self.line_bot_api = line_bot_api
-        self.message_handler = MessageHandler()
+        self.message_handler = message_handler
+
+        # Keyword message type -> (message factory taking request_host, shared quick reply)
+        self._keyword_replies = {
+            "menu": (
+                lambda request_host: self.message_handler.create_service_menu(),
+                QUICK_REPLY_BASIC
+            ),
+            "help": (
+                lambda request_host: self.message_handler.create_help_message(),
+                None
+            ),
+            "frequency": (
+                self.message_handler.create_frequency_services_carousel,
+                QUICK_REPLY_PRODUCTS
+            ),
+            "business": (
+                self.message_handler.create_company_introduction,
+                QUICK_REPLY_BASIC
+            ),
+            "manual": (
+                self.message_handler.create_manual_download_card,
+                QUICK_REPLY_BASIC
+            ),
+        }
+
+        # Structured agent response type -> reply message builder
+        self._agent_reply_builders = {
+            "flex_message": self._build_flex_reply,
+            "text_with_quick_reply": self._build_text_quick_reply,
+        }
+
+        # Exact admin commands (normalized text) -> reply text builder
+        self._admin_commands = {
+            **dict.fromkeys(ADMIN_STATUS_COMMANDS, self._admin_status),
+            **dict.fromkeys(HELP_COMMANDS, self._admin_help),
+        }
+
+    @staticmethod
+    def _build_flex_reply(agent_response: dict) -> FlexSendMessage:
+        """Build a flex reply from a structured agent response"""
+        return FlexSendMessage(
+            alt_text=agent_response.get("alt_text", "VibPath 服務"),
+            contents=agent_response["content"]
+        )
+
+    @staticmethod
+    def _build_text_quick_reply(agent_response: dict) -> TextSendMessage:
+        """Build a text reply with the basic quick reply from a structured agent response"""
+        return TextSendMessage(
+            text=agent_response["content"],
+            quick_reply=QUICK_REPLY_BASIC
+        )
+
+    async def _reply(self, event, messages):
+        """
+        Send all messages for an event in a single reply call
+
+        Falls back to the push API when the reply token is no longer valid
+        (e.g. the AI agent took longer than the token lifetime).
+
+        Args:
+            event: LINE webhook event carrying the reply token and source
+            messages: A message object or a list of message objects
+        """
+        if isinstance(messages, list) and len(messages) > MAX_REPLY_MESSAGES:
+            logger.warning(
+                "Reply has %d messages, truncating to %d", len(messages), MAX_REPLY_MESSAGES
+            )
+            messages = messages[:MAX_REPLY_MESSAGES]
+        try:
+            await self.line_bot_api.reply_message(event.reply_token, messages)
+        except LineBotApiError as e:
+            # Push to the conversation the event came from (group, room, or 1:1 chat)
+            source = event.source
+            push_to = (
+                getattr(source, 'group_id', None)
+                or getattr(source, 'room_id', None)
+                or getattr(source, 'user_id', None)
+            )
+            if e.error.message != INVALID_REPLY_TOKEN or not push_to:
+                raise
+            logger.warning("Reply token invalid for %s, falling back to push message", push_to)
+            await self.line_bot_api.push_message(push_to, messages)
+
+    @staticmethod
+    async def _display_loading_animation(user_id: str):
+        """
+        Show the LINE loading animation, logging instead of raising on failure
+
+        Args:
+            user_id: LINE user ID
+        """
+        try:
+            await before_reply_display_loading_animation(user_id, loading_seconds=60)
+        except Exception as e:
+            logger.warning("Failed to display loading animation: %s", e)
 
     async def handle_follow_event(self, event: FollowEvent):
         """
@@ -36,11 +151,11 @@ class WebhookHandler:
             event: LINE FollowEvent
         """
         user_id = event.source.user_id
-        logger.info(f"New user followed: {user_id}")
+        logger.info("New user followed: %s", user_id)
 
         # Send welcome message
         welcome_messages = self.message_handler.create_welcome_message()
-        await self.line_bot_api.reply_message(event.reply_token, welcome_messages)
+        await self._reply(event, welcome_messages)
 
     async def handle_text_message(self, event: MessageEvent, request_host: str = None):
         """
@@ -51,15 +166,16 @@ class WebhookHandler:
             request_host: Request host for dynamic URL generation
         """
         msg = event.message.text
+        msg_norm = msg.strip().lower()
         user_id = event.source.user_id
-        logger.info(f"Received message from {user_id}: {msg[:50]}...")
+        logger.info("Received message from %s: %.50s...", user_id, msg)
 
         # Check if user is admin
         is_admin = admin_config.is_admin(user_id)
 
         # Handle admin commands (pause/resume)
         if is_admin:
-            admin_reply = await self._handle_admin_commands(event, msg)
+            admin_reply = await self._handle_admin_commands(event, msg_norm)
             if admin_reply:
                 return  # Admin command was handled
 
@@ -69,105 +185,89 @@ class WebhookHandler:
             return
 
         # Check if user wants to toggle AI reply
-        if msg.strip().lower() in ['ai開關', 'ai設定']:
-            reply_msg = ai_toggle_handler.handle_toggle(user_id)
-            await self.line_bot_api.reply_message(event.reply_token, reply_msg)
+        if msg_norm in AI_TOGGLE_COMMANDS:
+            reply_msg = await asyncio.to_thread(ai_toggle_handler.handle_toggle, user_id)
+            await self._reply(event, reply_msg)
             return
 
         # Check if user wants to check AI status
-        if msg.strip().lower() in ['ai狀態', 'ai status']:
-            reply_msg = ai_toggle_handler.get_status(user_id)
-            await self.line_bot_api.reply_message(event.reply_token, reply_msg)
+        if msg_norm in AI_STATUS_COMMANDS:
+            reply_msg = await asyncio.to_thread(ai_toggle_handler.get_status, user_id)
+            await self._reply(event, reply_msg)
             return
 
-        # Detect message type for appropriate handling
-        message_type = self.message_handler.detect_message_type(msg)
-
-        # Check if AI reply is enabled for this user
-        is_ai_enabled = user_preference_service.is_ai_reply_enabled(user_id)
-        logger.debug(f"AI reply status for {user_id}: {'Enabled' if is_ai_enabled else 'Disabled'}")
-
-        # Show loading animation while processing (only if AI enabled)
-        if is_ai_enabled:
-            try:
-                await before_reply_display_loading_animation(user_id, loading_seconds=60)
-            except Exception as e:
-                logger.warning(f"Failed to display loading animation: {e}")
+        # Check if AI reply is enabled for this user: a cache hit is answered on the
+        # event loop, only a miss goes to (blocking) MongoDB in a worker thread
+        is_ai_enabled = user_preferences_cache.get(user_id)
+        if is_ai_enabled is None:
+            is_ai_enabled = await asyncio.to_thread(user_preference_service.is_ai_reply_enabled, user_id)
+        logger.debug("AI reply status for %s: %s", user_id, 'Enabled' if is_ai_enabled else 'Disabled')
 
         # Try AI agent first with tools (only if AI enabled)
         if is_ai_enabled:
             try:
-                agent_response = await ai_agent_service.call_agent(msg, user_id, request_host)
+                # Show loading animation while the agent works, without delaying the agent call.
+                # return_exceptions keeps gather waiting for the animation request even when
+                # the agent fails, so it can never land after the fallback reply.
+                agent_response, _ = await asyncio.gather(
+                    ai_agent_service.call_agent(msg, user_id, request_host),
+                    self._display_loading_animation(user_id),
+                    return_exceptions=True
+                )
+                if isinstance(agent_response, BaseException):
+                    raise agent_response
 
                 # Check if agent returned a structured response
                 if isinstance(agent_response, dict):
-                    if agent_response.get("type") == "flex_message":
-                        reply_msg = FlexSendMessage(
-                            alt_text=agent_response.get("alt_text", "VibPath 服務"),
-                            contents=agent_response["content"]
-                        )
-                        await self.line_bot_api.reply_message(event.reply_token, reply_msg)
-                        return
-                    elif agent_response.get("type") == "text_with_quick_reply":
-                        reply_msg = TextSendMessage(
-                            text=agent_response["content"],
-                            quick_reply=self.message_handler.create_quick_reply_basic()
-                        )
-                        await self.line_bot_api.reply_message(event.reply_token, reply_msg)
+                    build_reply = self._agent_reply_builders.get(agent_response.get("type"))
+                    if build_reply:
+                        await self._reply(event, build_reply(agent_response))
                         return
 
                 # If agent returned regular text, use it
                 if isinstance(agent_response, str) and agent_response.strip():
                     reply_msg = TextSendMessage(
                         text=agent_response,
-                        quick_reply=self.message_handler.create_quick_reply_basic()
+                        quick_reply=QUICK_REPLY_BASIC
                     )
-                    await self.line_bot_api.reply_message(event.reply_token, reply_msg)
+                    await self._reply(event, reply_msg)
                     return
 
             except AIAgentError as e:
-                logger.error(f"AI Agent failed: {e.message}", exc_info=True)
+                # The agent service already logged the traceback where the error was raised
+                logger.error("AI Agent failed: %s", e.message, exc_info=logger.isEnabledFor(logging.DEBUG))
                 # Fall through to keyword detection
             except Exception as e:
-                logger.error(f"Unexpected error in AI agent: {str(e)}", exc_info=True)
+                logger.error("Unexpected error in AI agent: %s", e, exc_info=True)
                 # Fall through to keyword detection
 
         # Fallback to keyword detection (only for specific keywords)
         # When AI is disabled, only respond to specific menu keywords
-        logger.debug(f"Checking keyword detection for: {msg}")
+        logger.debug("Checking keyword detection for: %s", msg)
         reply_msg = None
 
-        if message_type == "menu":
-            reply_msg = self.message_handler.create_service_menu()
-            # Add quick reply to flex message
-            reply_msg.quick_reply = self.message_handler.create_quick_reply_basic()
-        elif message_type == "help":
-            reply_msg = self.message_handler.create_help_message()
-        elif message_type == "frequency":
-            reply_msg = self.message_handler.create_frequency_services_carousel(request_host)
-            # Add quick reply to flex message
-            reply_msg.quick_reply = self.message_handler.create_quick_reply_products()
-        elif message_type == "business":
-            reply_msg = self.message_handler.create_company_introduction(request_host)
-            # Add quick reply to flex message
-            reply_msg.quick_reply = self.message_handler.create_quick_reply_basic()
-        elif message_type == "manual":
-            reply_msg = self.message_handler.create_manual_download_card(request_host)
-            # Add quick reply to flex message
-            reply_msg.quick_reply = self.message_handler.create_quick_reply_basic()
+        # Detect message type only when the AI path did not reply
+        message_type = self.message_handler.detect_message_type(msg)
+        keyword_reply = self._keyword_replies.get(message_type)
+        if keyword_reply:
+            build_message, quick_reply = keyword_reply
+            reply_msg = build_message(request_host)
+            if quick_reply:
+                # Add quick reply to flex message
+                reply_msg.quick_reply = quick_reply
         elif not is_ai_enabled:
             # AI is disabled and no keyword match - don't reply
-            logger.info(f"AI disabled and no keyword match for '{msg}' - not replying")
+            logger.info("AI disabled and no keyword match for '%s' - not replying", msg)
             return
         else:
             # AI is enabled but no keyword match - show error
             reply_msg = TextSendMessage(
                 text="抱歉，我暫時無法處理您的請求，請稍後再試或使用快速回覆按鈕。",
-                quick_reply=self.message_handler.create_quick_reply_basic()
+                quick_reply=QUICK_REPLY_BASIC
             )
 
         if reply_msg:
-            await self.line_bot_api.reply_message(event.reply_token, reply_msg)
+            await self._reply(event, reply_msg)
 
     async def handle_postback_event(self, event: PostbackEvent, request_host: str = None):
         """
@@ -179,65 +279,68 @@ class WebhookHandler:
         """
         user_id = event.source.user_id
         postback_data = event.postback.data
-        logger.info(f"Received postback from {user_id}: {postback_data}")
+        logger.info("Received postback from %s: %s", user_id, postback_data)
 
-        # Process postback with handler
-        reply_msg = postback_handler.handle_postback(postback_data, user_id, request_host)
-        await self.line_bot_api.reply_message(event.reply_token, reply_msg)
+        # Process postback with handler; only DB-backed actions leave the event loop
+        if postback_data in DB_POSTBACK_ACTIONS:
+            reply_msg = await asyncio.to_thread(postback_handler.handle_postback, postback_data, user_id, request_host)
+        else:
+            reply_msg = postback_handler.handle_postback(postback_data, user_id, request_host)
+        await self._reply(event, reply_msg)
 
-    async def _handle_admin_commands(self, event: MessageEvent, msg: str) -> bool:
+    async def _handle_admin_commands(self, event: MessageEvent, msg_norm: str) -> bool:
         """
         Handle admin commands (pause/resume/status/help)
 
+        Exact commands are looked up in a table first; pause and resume
+        take arguments or match loosely, so they are parsed afterwards.
+
         Args:
             event: LINE MessageEvent
-            msg: Message text
+            msg_norm: Message text, already stripped and lower-cased
 
         Returns:
             bool: True if command was handled, False otherwise
         """
-        # Check for pause command
-        pause_duration = admin_config.parse_pause_command(msg)
-        if pause_duration is not None:
-            admin_config.pause_bot(pause_duration, event.source.user_id)
-            pause_info = admin_config.get_pause_info()
-            reply_text = f"✅ Bot 已暫停\n⏰ 暫停時間: {pause_duration} 分鐘\n📅 恢復時間: {pause_info['pause_until']}"
-            await self.line_bot_api.reply_message(
-                event.reply_token,
-                TextSendMessage(text=reply_text)
-            )
-            return True
-
-        # Check for resume command
-        if admin_config.parse_resume_command(msg):
-            admin_config.resume_bot(event.source.user_id)
-            reply_text = "✅ Bot 已恢復運作"
-            await self.line_bot_api.reply_message(
-                event.reply_token,
-                TextSendMessage(text=reply_text)
-            )
-            return True
+        admin_id = event.source.user_id
 
-        # Check for status command
-        if msg.strip().lower() in ['狀態', 'status']:
-            pause_info = admin_config.get_pause_info()
-            if pause_info['paused']:
-                reply_text = f"⏸️ Bot 目前暫停中\n⏰ 剩餘時間: {pause_info['remaining_minutes']} 分鐘\n📅 恢復時間: {pause_info['pause_until']}"
+        command = self._admin_commands.get(msg_norm)
+        if command:
+            reply_text = command()
+        else:
+            pause_duration = admin_config.parse_pause_command(msg_norm)
+            if pause_duration is not None:
+                reply_text = self._admin_pause(pause_duration, admin_id)
+            elif admin_config.parse_resume_command(msg_norm):
+                reply_text = self._admin_resume(admin_id)
             else:
-                reply_text = "✅ Bot 目前正常運作"
-            await self.line_bot_api.reply_message(
-                event.reply_token,
-                TextSendMessage(text=reply_text)
-            )
-            return True
-
-        # Check for help command
-        if admin_config.parse_help_command(msg):
-            reply_text = admin_config.get_admin_help_message()
-            await self.line_bot_api.reply_message(
-                event.reply_token,
-                TextSendMessage(text=reply_text)
-            )
-            return True
-
-        return False
+                return False
+
+        await self._reply(event, TextSendMessage(text=reply_text))
+        return True
+
+    @staticmethod
+    def _admin_pause(pause_duration: int, admin_id: str) -> str:
+        """Pause the bot and describe the pause window"""
+        admin_config.pause_bot(pause_duration, admin_id)
+        pause_info = admin_config.get_pause_info()
+        return f"✅ Bot 已暫停\n⏰ 暫停時間: {pause_duration} 分鐘\n📅 恢復時間: {pause_info['pause_until']}"
+
+    @staticmethod
+    def _admin_resume(admin_id: str) -> str:
+        """Resume the bot"""
+        admin_config.resume_bot(admin_id)
+        return "✅ Bot 已恢復運作"
+
+    @staticmethod
+    def _admin_status() -> str:
+        """Describe the current pause state"""
+        pause_info = admin_config.get_pause_info()
+        if pause_info['paused']:
+            return f"⏸️ Bot 目前暫停中\n⏰ 剩餘時間: {pause_info['remaining_minutes']} 分鐘\n📅 恢復時間: {pause_info['pause_until']}"
+        return "✅ Bot 目前正常運作"
+
+    @staticmethod
+    def _admin_help() -> str:
+        """Admin command reference"""
+        return admin_config.get_admin_help_message()
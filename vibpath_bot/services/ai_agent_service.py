@@ -2,12 +2,17 @@
 AI Agent Service
 Manages Gemini AI agent initialization, session management, and query execution
 """
+import asyncio
 import os
-import json
 import re
+import time
+from collections import OrderedDict
 from google.adk.agents import Agent
+from google.adk.errors.session_not_found_error import SessionNotFoundError
 from google.adk.sessions import InMemorySessionService
 from google.adk.runners import Runner
+from google.adk.tools import FunctionTool
+from google.genai import errors as genai_errors
 from google.genai import types
 from vibpath_bot.tools.ai_tools import show_company_introduction, show_product_catalog, show_service_menu, show_product_details, show_detection_apps, show_manual_download
 from vibpath_bot.config.agent_prompts import get_agent_instruction
@@ -24,11 +29,54 @@ TOOL_MAP = {
     'show_detection_apps': show_detection_apps,
     'show_manual_download': show_manual_download,
 }
-TOOLS_WITH_HOST = {'show_company_introduction', 'show_product_catalog'}
+TOOLS_WITH_HOST = frozenset({'show_company_introduction', 'show_product_catalog'})
+# Tools whose output depends only on the request host, never on the conversation
+CACHEABLE_TOOLS = frozenset({
+    'show_company_introduction', 'show_product_catalog', 'show_service_menu',
+    'show_manual_download', 'show_detection_apps',
+})
+
+# Wrapped once here; ADK would otherwise re-wrap plain functions on every agent run
+AGENT_TOOLS = [FunctionTool(tool) for tool in TOOL_MAP.values()]
+
+# Upper bound on cached user sessions; least recently used ones are evicted
+MAX_ACTIVE_SESSIONS = 10_000
+
+# Per-user cache of host-only tool results (CACHEABLE_TOOLS), so a user repeating
+# a keyword-style query is answered without a model round trip
+RESPONSE_CACHE_SIZE = 1024
+RESPONSE_CACHE_TTL_SECONDS = 300
+
+# Agent runs allowed in flight at once; extra messages wait instead of piling onto the API
+MAX_CONCURRENT_AGENT_CALLS = int(os.getenv("MAX_CONCURRENT_AGENT_CALLS", "8"))
 
 # User-facing reply when the AI service is rate-limited or overloaded
 BUSY_MESSAGE = "⚠️ AI 服務目前繁忙中，請稍後再試。"
 
+# Speaker label prepended to every free-text agent reply
+AI_REPLY_PREFIX = "AI客服阿弦:\n"
+
+# Markdown formatting stripped from agent replies, matched in a single pass.
+# Alternatives are tried in order at each position.
+_MARKDOWN_PATTERN = re.compile(
+    r'(?P<bullet>^\s*[\*\-]\s+)'                         # bullet points -> •
+    r'|\[(?P<link_text>.+?)\]\((?P<link_url>.+?)\)'      # [text](url) -> text url
+    r'|\*{2,3}(?P<bold>.+?)\*{2,3}|__(?P<bold_u>.+?)__'  # **bold** / __bold__
+    r'|\*(?P<italic>.+?)\*|_(?P<italic_u>.+?)_',         # *italic* / _italic_
+    flags=re.MULTILINE
+)
+
+
+def _replace_markdown(match: re.Match) -> str:
+    """Replacement for a single _MARKDOWN_PATTERN match"""
+    group = match.lastgroup
+    if group == 'bullet':
+        return '• '
+    if group == 'link_url':
+        return f"{match.group('link_text')} {match.group('link_url')}"
+    # Emphasis may wrap other emphasis, e.g. **a *b* c**
+    return _MARKDOWN_PATTERN.sub(_replace_markdown, match.group(group))
+
 
 class AIAgentService:
     """Service for managing AI agent and sessions"""
@@ -42,14 +90,22 @@ class AIAgentService:
             model=ai_model,
             description="VibPath智能客服",
             instruction=get_agent_instruction("vibpath_customer_service"),
-            tools=[show_company_introduction, show_product_catalog, show_service_menu, show_product_details, show_detection_apps, show_manual_download],
+            tools=AGENT_TOOLS,
         )
         logger.info(f"Agent '{self.root_agent.name}' created successfully")
 
         # Session Management
         self.session_service = InMemorySessionService()
         self.app_name = "linebot_adk_app"
-        self.active_sessions = {}
+        self.active_sessions: OrderedDict[str, str] = OrderedDict()
+        # Per-user locks so concurrent messages share one session creation
+        self._session_locks: dict[str, asyncio.Lock] = {}
+
+        # (user_id, normalized query, request_host) -> (tool result, monotonic timestamp)
+        self._response_cache: OrderedDict[tuple, tuple] = OrderedDict()
+
+        # Throttle concurrent agent runs to ease rate limiting (429)
+        self._agent_semaphore = asyncio.Semaphore(MAX_CONCURRENT_AGENT_CALLS)
 
         # Initialize runner
         self.runner = Runner(
@@ -72,8 +128,24 @@ class AIAgentService:
         Raises:
             SessionError: If session creation fails
         """
+        # Fast path: existing session, no lock needed
+        session_id = self.active_sessions.get(user_id)
+        if session_id is not None:
+            self.active_sessions.move_to_end(user_id)
+            logger.debug(f"Using existing session for user '{user_id}': {session_id}")
+            return session_id
+
+        lock = self._session_locks.get(user_id)
+        if lock is None:
+            lock = self._session_locks[user_id] = asyncio.Lock()
+
         try:
-            if user_id not in self.active_sessions:
+            async with lock:
+                # Another message from this user may have created it while we waited
+                session_id = self.active_sessions.get(user_id)
+                if session_id is not None:
+                    return session_id
+
                 # Create a new session for this user
                 session_id = f"session_{user_id}"
                 await self.session_service.create_session(
@@ -81,30 +153,27 @@ class AIAgentService:
                 )
                 self.active_sessions[user_id] = session_id
                 logger.info(f"New session created for user '{user_id}': {session_id}")
-            else:
-                # Use existing session
-                session_id = self.active_sessions[user_id]
-                logger.debug(f"Using existing session for user '{user_id}': {session_id}")
+            await self._evict_stale_sessions()
 
             return session_id
         except Exception as e:
             logger.error(f"Failed to create session for user '{user_id}': {str(e)}", exc_info=True)
             raise SessionError(f"Session creation failed", detail=str(e))
 
-    def _execute_tool(self, tool_call, request_host: str = None):
-        """
-        Execute a tool based on tool_call information
-
-        Args:
-            tool_call: Tool call object from agent event
-            request_host: Request host for dynamic URL generation
-
-        Returns:
-            Tool execution result (dict or None)
-        """
-        tool_name = tool_call.function.name
-        args = json.loads(tool_call.function.arguments) if tool_call.function.arguments else {}
-        return self._invoke_tool(tool_name, args, request_host)
+    async def _evict_stale_sessions(self):
+        """Drop least recently used sessions beyond MAX_ACTIVE_SESSIONS"""
+        while len(self.active_sessions) > MAX_ACTIVE_SESSIONS:
+            user_id, session_id = self.active_sessions.popitem(last=False)
+            lock = self._session_locks.get(user_id)
+            if lock is not None and not lock.locked():
+                del self._session_locks[user_id]
+            try:
+                await self.session_service.delete_session(
+                    app_name=self.app_name, user_id=user_id, session_id=session_id
+                )
+                logger.debug(f"Evicted session for user '{user_id}': {session_id}")
+            except Exception as e:
+                logger.warning(f"Failed to delete evicted session for user '{user_id}': {str(e)}")
 
     def _clean_markdown(self, text: str) -> str:
         """
@@ -116,17 +185,10 @@ class AIAgentService:
         Returns:
             str: Clean text without markdown
         """
-        # Remove bold **text** or __text__
-        text = re.sub(r'\*\*(.+?)\*\*', r'\1', text)
-        text = re.sub(r'__(.+?)__', r'\1', text)
-        # Remove italic *text* or _text_
-        text = re.sub(r'\*(.+?)\*', r'\1', text)
-        text = re.sub(r'_(.+?)_', r'\1', text)
-        # Remove markdown links [text](url) -> text (url)
-        text = re.sub(r'\[(.+?)\]\((.+?)\)', r'\1 \2', text)
-        # Remove bullet points
-        text = re.sub(r'^\s*[\*\-]\s+', '• ', text, flags=re.MULTILINE)
-        return text
+        # Plain replies have none of the characters any markdown rule needs
+        if '*' not in text and '_' not in text and '[' not in text and '-' not in text:
+            return text
+        return _MARKDOWN_PATTERN.sub(_replace_markdown, text)
 
     async def _process_events(self, events, request_host: str = None):
         """
@@ -137,34 +199,24 @@ class AIAgentService:
             request_host: Request host for dynamic URL generation
 
         Returns:
-            Final response (string or dict)
+            Tuple of final response (string or dict) and the name of the tool
+            that produced it (None for text responses)
         """
         final_response = "抱歉，我暫時無法處理您的請求，請稍後再試或使用快速回覆按鈕。"
 
         async for event in events:
-            # Check for tool calls in multiple locations
-            # Method 1: Check event.tool_calls
-            if hasattr(event, 'tool_calls') and event.tool_calls:
-                for tool_call in event.tool_calls:
-                    try:
-                        tool_result = self._execute_tool(tool_call, request_host)
-                        if tool_result:
-                            logger.info("Tool executed successfully via tool_calls")
-                            return tool_result
-                    except ToolExecutionError as e:
-                        logger.error(f"Tool execution error: {e.message}")
-                    except Exception as e:
-                        logger.error(f"Unexpected tool execution error: {str(e)}", exc_info=True)
-
-            # Method 2: Check event.content.parts for function_call
-            if hasattr(event, 'content') and event.content and hasattr(event.content, 'parts') and event.content.parts:
-                for part in event.content.parts:
-                    if hasattr(part, 'function_call') and part.function_call:
+            # ADK surfaces tool calls as function_call parts of the event content
+            content = getattr(event, 'content', None)
+            parts = content.parts if content is not None else None
+            if parts:
+                for part in parts:
+                    function_call = part.function_call
+                    if function_call:
                         try:
-                            tool_result = self._execute_tool_from_function_call(part.function_call, request_host)
+                            tool_result = self._execute_tool_from_function_call(function_call, request_host)
                             if tool_result:
                                 logger.info("Tool executed successfully via function_call in parts")
-                                return tool_result
+                                return tool_result, function_call.name
                         except ToolExecutionError as e:
                             logger.error(f"Tool execution error: {e.message}")
                         except Exception as e:
@@ -172,34 +224,35 @@ class AIAgentService:
 
             # Check for final response
             if event.is_final_response():
-                if event.content and event.content.parts:
-                    # Get only text parts
-                    text_parts = [p.text for p in event.content.parts if hasattr(p, 'text') and p.text]
-                    if text_parts:
-                        raw_text = text_parts[0]
-                        clean_text = self._clean_markdown(raw_text)
-                        final_response = "AI客服阿弦:\n" + clean_text
+                if parts:
+                    # Use the first text part only
+                    raw_text = next((p.text for p in parts if p.text), None)
+                    if raw_text:
+                        final_response = AI_REPLY_PREFIX + self._clean_markdown(raw_text)
                 elif event.actions and event.actions.escalate:
                     final_response = f"Agent escalated: {event.error_message or 'No specific message.'}"
                 break
 
-        return final_response
+        return final_response, None
 
     def _execute_tool_from_function_call(self, function_call, request_host: str = None):
         """Execute a tool from a function_call object in content parts."""
         tool_name = function_call.name
-        args = dict(function_call.args) if function_call.args else {}
+        # args is already a dict; _invoke_tool never mutates it
+        args = function_call.args or {}
         return self._invoke_tool(tool_name, args, request_host)
 
     def _invoke_tool(self, tool_name: str, args: dict, request_host: str = None):
         """Shared tool invocation logic."""
-        if tool_name in TOOLS_WITH_HOST:
-            args['request_host'] = request_host
+        tool = TOOL_MAP.get(tool_name)
+        if tool is not None:
+            if tool_name in TOOLS_WITH_HOST:
+                # Copy rather than mutate: args may belong to the agent event
+                args = {**args, 'request_host': request_host}
 
-        if tool_name in TOOL_MAP:
             logger.info(f"Executing tool: {tool_name}")
             try:
-                result = TOOL_MAP[tool_name](**args)
+                result = tool(**args)
                 logger.debug(f"Tool '{tool_name}' executed successfully")
                 return result
             except Exception as e:
@@ -211,11 +264,35 @@ class AIAgentService:
 
     async def _run_and_process(self, user_id: str, session_id: str,
                                content, request_host: str = None):
-        """Run agent and process events (single execution path)."""
-        events = self.runner.run_async(
-            user_id=user_id, session_id=session_id, new_message=content
-        )
-        return await self._process_events(events, request_host)
+        """Run agent and process events (single execution path); returns (response, tool name)."""
+        async with self._agent_semaphore:
+            events = self.runner.run_async(
+                user_id=user_id, session_id=session_id, new_message=content
+            )
+            try:
+                return await self._process_events(events, request_host)
+            finally:
+                # Stop the run right away when a tool result or final answer ends processing early
+                await events.aclose()
+
+    def _get_cached_response(self, cache_key: tuple):
+        """Return a fresh cached tool result, or None"""
+        entry = self._response_cache.get(cache_key)
+        if entry is None:
+            return None
+        result, timestamp = entry
+        if time.monotonic() - timestamp > RESPONSE_CACHE_TTL_SECONDS:
+            del self._response_cache[cache_key]
+            return None
+        self._response_cache.move_to_end(cache_key)
+        return result
+
+    def _cache_response(self, cache_key: tuple, result: dict):
+        """Store a tool result, evicting the least recently used beyond the size cap"""
+        self._response_cache[cache_key] = (result, time.monotonic())
+        self._response_cache.move_to_end(cache_key)
+        while len(self._response_cache) > RESPONSE_CACHE_SIZE:
+            self._response_cache.popitem(last=False)
 
     async def call_agent(self, query: str, user_id: str, request_host: str = None):
         """
@@ -234,6 +311,16 @@ class AIAgentService:
         """
         logger.info(f"User query from '{user_id}': {query[:50]}...")
 
+        # Nothing to ask the model; let the caller fall back to keyword handling
+        if not query.strip():
+            return ""
+
+        cache_key = (user_id, query.strip().lower(), request_host)
+        cached = self._get_cached_response(cache_key)
+        if cached is not None:
+            logger.info(f"Serving cached tool result for '{user_id}'")
+            return cached
+
         try:
             # Get or create a session for this user
             session_id = await self.get_or_create_session(user_id)
@@ -241,32 +328,38 @@ class AIAgentService:
             # Prepare the user's message in ADK format
             content = types.Content(role="user", parts=[types.Part(text=query)])
 
-            final_response = await self._run_and_process(
+            final_response, tool_name = await self._run_and_process(
                 user_id, session_id, content, request_host
             )
 
+        except SessionNotFoundError as e:
+            logger.warning(f"Session lost during agent execution: {str(e)}")
+            logger.info(f"Recreating lost session for user '{user_id}'")
+            self.active_sessions.pop(user_id, None)
+            session_id = await self.get_or_create_session(user_id)
+            try:
+                final_response, tool_name = await self._run_and_process(
+                    user_id, session_id, content, request_host
+                )
+            except Exception as e2:
+                logger.error(f"Retry failed: {str(e2)}", exc_info=True)
+                raise AIAgentError("Agent execution failed after retry", detail=str(e2))
         except ValueError as e:
-            logger.warning(f"ValueError during agent execution: {str(e)}")
-
-            if "Session not found" in str(e):
-                logger.info(f"Recreating lost session for user '{user_id}'")
-                self.active_sessions.pop(user_id, None)
-                session_id = await self.get_or_create_session(user_id)
-                try:
-                    final_response = await self._run_and_process(
-                        user_id, session_id, content, request_host
-                    )
-                except Exception as e2:
-                    logger.error(f"Retry failed: {str(e2)}", exc_info=True)
-                    raise AIAgentError("Agent execution failed after retry", detail=str(e2))
-            else:
-                logger.error(f"Agent execution error: {str(e)}", exc_info=True)
-                raise AIAgentError("Agent execution failed", detail=str(e))
+            logger.error(f"Agent execution error: {str(e)}", exc_info=True)
+            raise AIAgentError("Agent execution failed", detail=str(e))
         except Exception as e:
-            error_str = str(e).lower()
-            is_rate_limit = "429" in error_str or "rate limit" in error_str or "quota" in error_str or "resource exhausted" in error_str
-            is_overloaded = "503" in error_str or "unavailable" in error_str or "high demand" in error_str
-            is_key_error = "api key" in error_str and ("invalid" in error_str or "expired" in error_str)
+            if isinstance(e, genai_errors.APIError):
+                # Gemini API errors carry the HTTP status code
+                error_str = str(e).lower()
+                is_rate_limit = e.code == 429
+                # Some overload errors arrive without a 503, so keep the message check too
+                is_overloaded = e.code == 503 or "unavailable" in error_str or "high demand" in error_str
+                is_key_error = e.code in (400, 401, 403) and "api key" in error_str and ("invalid" in error_str or "expired" in error_str)
+            else:
+                error_str = str(e).lower()
+                is_rate_limit = "429" in error_str or "rate limit" in error_str or "quota" in error_str or "resource exhausted" in error_str
+                is_overloaded = "503" in error_str or "unavailable" in error_str or "high demand" in error_str
+                is_key_error = "api key" in error_str and ("invalid" in error_str or "expired" in error_str)
 
             if is_rate_limit or is_overloaded or is_key_error:
                 if is_rate_limit:
@@ -285,7 +378,7 @@ class AIAgentService:
                         )
                         os.environ["GOOGLE_API_KEY"] = fallback_key
                         try:
-                            final_response = await self._run_and_process(
+                            final_response, tool_name = await self._run_and_process(
                                 user_id, session_id, content, request_host
                             )
                             break
@@ -304,6 +397,11 @@ class AIAgentService:
                 logger.error(f"Unexpected error during agent execution: {str(e)}", exc_info=True)
                 raise AIAgentError("Unexpected agent error", detail=str(e))
 
+        # Only host-only tool results are cached; text and context-dependent tools
+        # (e.g. show_product_details) depend on the conversation
+        if tool_name in CACHEABLE_TOOLS:
+            self._cache_response(cache_key, final_response)
+
         logger.info(f"Agent response for '{user_id}': {str(final_response)[:50]}...")
         return final_response
 
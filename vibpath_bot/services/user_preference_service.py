@@ -4,6 +4,7 @@ Integrates MongoDB and in-memory cache for user preferences
 """
 from vibpath_bot.utils.mongodb_client import mongodb_client
 from vibpath_bot.utils.user_cache import user_preferences_cache
+from vibpath_bot.utils.logger import db_logger as logger
 
 
 class UserPreferenceService:
@@ -13,6 +14,26 @@ class UserPreferenceService:
     def is_ai_reply_enabled(user_id: str) -> bool:
         """
         Check if AI reply is enabled for a user
+        Uses cache-first pattern: a fresh cache entry skips MongoDB entirely.
+        Writes go through set_ai_reply_status, which keeps the cache in sync.
+
+        Args:
+            user_id: LINE user ID
+
+        Returns:
+            bool: True if AI reply enabled, False otherwise
+            Default: True (enabled) if not found
+        """
+        cached_status = user_preferences_cache.get(user_id)
+        if cached_status is not None:
+            return cached_status
+
+        return UserPreferenceService._load_ai_reply_status(user_id)
+
+    @staticmethod
+    def _load_ai_reply_status(user_id: str) -> bool:
+        """
+        Load AI reply status for a user
         Uses database-first pattern: check MongoDB first, fallback to cache if DB unavailable
 
         Args:
@@ -25,25 +46,25 @@ class UserPreferenceService:
         # Check if MongoDB is connected
         if mongodb_client.is_connected():
             # Try MongoDB first
-            print(f"🔌 MongoDB connected, querying for user {user_id}...")
+            logger.debug("MongoDB connected, querying for user %s", user_id)
             db_status = mongodb_client.get_ai_reply_status(user_id)
 
             # Update cache with fresh data from DB
             user_preferences_cache.set(user_id, db_status)
-            print(f"✅ Got status from MongoDB for user {user_id}: AI={db_status}")
+            logger.debug("Got status from MongoDB for user %s: AI=%s", user_id, db_status)
 
             return db_status
         else:
             # MongoDB not available, fallback to cache
-            print(f"⚠️ MongoDB not connected, using cache for user {user_id}...")
+            logger.debug("MongoDB not connected, using cache for user %s", user_id)
             cached_status = user_preferences_cache.get(user_id)
 
             if cached_status is not None:
-                print(f"🎯 Cache FALLBACK for user {user_id}: AI={cached_status}")
+                logger.debug("Cache fallback for user %s: AI=%s", user_id, cached_status)
                 return cached_status
             else:
                 # No cache available either, return default
-                print(f"⚠️ No cache available for user {user_id}, using default: AI=True")
+                logger.warning("No cache available for user %s, using default: AI=True", user_id)
                 return True
 
     @staticmethod
@@ -65,12 +86,12 @@ class UserPreferenceService:
         if db_success:
             # Only update cache if DB write succeeded
             user_preferences_cache.set(user_id, enabled)
-            print(f"✅ Updated both DB and cache for user {user_id}: AI={enabled}")
+            logger.debug("Updated both DB and cache for user %s: AI=%s", user_id, enabled)
             return True
         else:
             # DB write failed - invalidate cache to force re-fetch from DB next time
             user_preferences_cache.invalidate(user_id)
-            print(f"❌ MongoDB write failed for user {user_id} - cache invalidated")
+            logger.error("MongoDB write failed for user %s - cache invalidated", user_id)
             return False
 
     @staticmethod
@@ -84,8 +105,8 @@ class UserPreferenceService:
         Returns:
             bool: New AI reply status (True=enabled, False=disabled)
         """
-        # Get current status (will use cache if available)
-        current_status = UserPreferenceService.is_ai_reply_enabled(user_id)
+        # Get current status from the database so the toggle never flips a stale value
+        current_status = UserPreferenceService._load_ai_reply_status(user_id)
 
         # Toggle to opposite
         new_status = not current_status
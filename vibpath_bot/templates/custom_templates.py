@@ -2,12 +2,60 @@
 Custom Flex Message templates for VibPath frequency therapy business.
 Includes company introduction and frequency therapy services carousel.
 """
+from functools import lru_cache
 from typing import List, Dict, Any
 from linebot.models import FlexSendMessage, BubbleContainer, CarouselContainer
 from ..config.static_urls import static_url_manager
 from ..config.button_config import button_config_manager
 
 
+# Products shown in the services carousel, in display order
+_SERVICES = (
+    {
+        "id": "service_7_83hz",
+        "name": "7.83Hz 舒曼波",
+        "description": "地球基礎頻率\n放鬆身心 · 減壓體驗",
+        "image": "services/7.83HZ.jpg"
+    },
+    {
+        "id": "service_13Freq",
+        "name": "13頻 脈輪波",
+        "description": "大腦α波共振\n專注提升 · 創意啟發",
+        "image": "services/13Freq.jpg"
+    },
+    {
+        "id": "service_40hz",
+        "name": "40Hz γ波",
+        "description": "高頻能量激活\n意識提升 · 靈性覺醒",
+        "image": "services/40HZ.jpg"
+    },
+    {
+        "id": "service_double_freq",
+        "name": "雙頻 α/θ波",
+        "description": "多頻率組合\n全方位體驗",
+        "image": "services/DoubleFreq.jpg"
+    },
+    {
+        "id": "service_pulse_gen",
+        "name": "客製頻率 脈衝產生器",
+        "description": "11頻率可選\n客製燒錄 · 精準穩定",
+        "image": "services/PulseGen.jpg"
+    },
+    {
+        "id": "service_composite_freq",
+        "name": "複合式頻率產生器",
+        "description": "0.5Hz + 8.0Hz 雙頻\n深層助眠 · 放鬆共振",
+        "image": "services/CompositeFreq.png"
+    },
+    {
+        "id": "service_ten_freq",
+        "name": "十頻儀",
+        "description": "10 頻率一鍵切換\nOLED 顯示 · 銅線加強",
+        "image": "services/十頻儀.png"
+    }
+)
+
+
 class BusinessTemplates:
     """VibPath frequency therapy business templates"""
 
@@ -19,7 +67,25 @@ class BusinessTemplates:
         Returns:
             FlexSendMessage: Company introduction card
         """
-        bubble = BubbleContainer(
+        # Fresh wrapper so callers can attach their own quick reply
+        return FlexSendMessage(
+            alt_text="VibPath 公司介紹",
+            contents=BusinessTemplates._company_introduction_bubble(request_host)
+        )
+
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _company_introduction_bubble(request_host: str = None) -> BubbleContainer:
+        """
+        Company introduction bubble, built once per request host.
+        Image URLs and footer buttons are resolved on first build, so later
+        runtime changes (static_url_manager base URL, button_config_manager
+        update_button_url/add_button_group) are not reflected until restart.
+
+        Returns:
+            BubbleContainer: Company introduction bubble (shared, do not mutate)
+        """
+        return BubbleContainer(
             hero={
                 "type": "image",
                 "url": static_url_manager.get_image_url("business/HomePage.png", request_host),
@@ -82,8 +148,6 @@ class BusinessTemplates:
             footer=button_config_manager.get_footer_box("company_introduction")
         )
 
-        return FlexSendMessage(alt_text="VibPath 公司介紹", contents=bubble)
-
     @staticmethod
     def frequency_services_carousel(request_host: str = None) -> FlexSendMessage:
         """
@@ -92,48 +156,26 @@ class BusinessTemplates:
         Returns:
             FlexSendMessage: Frequency services carousel
         """
-        services = [
-            {
-                "name": "7.83Hz 舒曼波",
-                "description": "地球基礎頻率\n放鬆身心 · 減壓體驗",
-                "image": "services/7.83HZ.jpg"
-            },
-            {
-                "name": "13頻 脈輪波",
-                "description": "大腦α波共振\n專注提升 · 創意啟發",
-                "image": "services/13Freq.jpg"
-            },
-            {
-                "name": "40Hz γ波",
-                "description": "高頻能量激活\n意識提升 · 靈性覺醒",
-                "image": "services/40HZ.jpg"
-            },
-            {
-                "name": "雙頻 α/θ波",
-                "description": "多頻率組合\n全方位體驗",
-                "image": "services/DoubleFreq.jpg"
-            },
-            {
-                "name": "客製頻率 脈衝產生器",
-                "description": "11頻率可選\n客製燒錄 · 精準穩定",
-                "image": "services/PulseGen.jpg"
-            },
-            {
-                "name": "複合式頻率產生器",
-                "description": "0.5Hz + 8.0Hz 雙頻\n深層助眠 · 放鬆共振",
-                "image": "services/CompositeFreq.png"
-            },
-            {
-                "name": "十頻儀",
-                "description": "10 頻率一鍵切換\nOLED 顯示 · 銅線加強",
-                "image": "services/十頻儀.png"
-            }
-        ]
+        # Fresh wrapper so callers can attach their own quick reply
+        return FlexSendMessage(
+            alt_text="VibPath 商品服務",
+            contents=BusinessTemplates._frequency_services_carousel(request_host)
+        )
 
-        bubbles = []
-        service_ids = ["service_7_83hz", "service_13Freq", "service_40hz", "service_double_freq", "service_pulse_gen", "service_composite_freq", "service_ten_freq"]
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _frequency_services_carousel(request_host: str = None) -> CarouselContainer:
+        """
+        Frequency services carousel, built once per request host.
+        Image URLs and footer buttons are resolved on first build, so later
+        runtime changes (static_url_manager base URL, button_config_manager
+        update_button_url/add_button_group) are not reflected until restart.
 
-        for i, service in enumerate(services):
+        Returns:
+            CarouselContainer: Services carousel (shared, do not mutate)
+        """
+        bubbles = []
+        for service in _SERVICES:
             bubble = BubbleContainer(
                 hero={
                     "type": "image",
@@ -163,9 +205,8 @@ class BusinessTemplates:
                         }
                     ]
                 },
-                footer=button_config_manager.get_footer_box(service_ids[i])
+                footer=button_config_manager.get_footer_box(service["id"])
             )
             bubbles.append(bubble)
 
-        carousel = CarouselContainer(contents=bubbles)
-        return FlexSendMessage(alt_text="VibPath 商品服務", contents=carousel)
\ No newline at end of file
+        return CarouselContainer(contents=bubbles)
@@ -2,6 +2,7 @@
 LINE Bot Flex Message templates for VibPath services.
 Provides reusable templates for service menus, error messages, etc.
 """
+from functools import lru_cache
 from typing import Dict, Any, List, Optional
 from linebot.models import FlexSendMessage, BubbleContainer, CarouselContainer
 
@@ -18,7 +19,22 @@ class FlexMessageTemplates:
         Returns:
             FlexSendMessage: Service menu card
         """
-        bubble = BubbleContainer(
+        # Fresh wrapper so callers can attach their own quick reply
+        return FlexSendMessage(
+            alt_text="VibPath 服務選單",
+            contents=FlexMessageTemplates._service_menu_bubble()
+        )
+
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def _service_menu_bubble() -> BubbleContainer:
+        """
+        Service menu bubble, built once since its layout is static.
+
+        Returns:
+            BubbleContainer: Service menu bubble
+        """
+        return BubbleContainer(
             body={
                 "type": "box",
                 "layout": "vertical",
@@ -183,8 +199,6 @@ class FlexMessageTemplates:
             }
         )
 
-        return FlexSendMessage(alt_text="VibPath 服務選單", contents=bubble)
-
     @staticmethod
     def error_message(error_text: str) -> FlexSendMessage:
         """
@@ -236,15 +250,3 @@ class FlexMessageTemplates:
         )
 
         return FlexSendMessage(alt_text="錯誤訊息", contents=bubble)
-
-    @staticmethod
-    def welcome_carousel() -> FlexSendMessage:
-        """
-        Create a welcome carousel with VibPath services.
-
-        Returns:
-            FlexSendMessage: Welcome carousel
-        """
-        # TODO: 可實現歡迎輪播卡片
-        # 可以包含：產品介紹、企業簡介、使用指南等
-        pass
\ No newline at end of file
@@ -2,9 +2,108 @@
 AI Agent tools for LINE Bot interactions.
 Provides tools for AI to return Flex Messages and structured responses.
 """
+from functools import lru_cache
+from types import MappingProxyType
 from typing import Dict, Any, Optional
-from linebot.models import FlexSendMessage
+from ..config.env_config import settings
+from ..handlers.postback_handler import postback_handler
 from ..templates.bubble_templates import BubbleTemplates
+from ..templates.custom_templates import BusinessTemplates
+from ..templates.flex_templates import FlexMessageTemplates
+
+# Product aliases (lowercased) mapped to postback explanation keys
+PRODUCT_EXPLANATION_KEYS = {
+    "7_83hz": "explain_7_83hz",
+    "7.83hz": "explain_7_83hz",
+    "舒曼波": "explain_7_83hz",
+    "13freq": "explain_13Freq",
+    "13頻": "explain_13Freq",
+    "脈輪": "explain_13Freq",
+    "40hz": "explain_40hz",
+    "gamma": "explain_40hz",
+    "γ波": "explain_40hz",
+    "double_freq": "explain_double_freq",
+    "雙頻": "explain_double_freq",
+    "alpha": "explain_double_freq",
+    "theta": "explain_double_freq",
+    "pulse_gen": "explain_pulse_gen",
+    "客製頻率": "explain_pulse_gen",
+    "composite_freq": "explain_composite_freq",
+    "複合式": "explain_composite_freq",
+    "複合式頻率": "explain_composite_freq",
+    "0.5hz": "explain_composite_freq",
+    "ten_freq": "explain_ten_freq",
+    "十頻": "explain_ten_freq",
+    "十頻儀": "explain_ten_freq",
+    "整合十頻": "explain_ten_freq",
+    "整合十頻機": "explain_ten_freq",
+    "10頻": "explain_ten_freq",
+    "pemf": "explain_ten_freq",
+}
+
+PRODUCT_NOT_FOUND_MESSAGE = "抱歉，找不到該產品的詳細資訊。請使用選單查看我們的產品。"
+
+# Shared fallback result for unknown products; treated as read-only by callers
+PRODUCT_NOT_FOUND_RESPONSE = {
+    "type": "text",
+    "content": PRODUCT_NOT_FOUND_MESSAGE
+}
+
+
+# Flex responses only depend on the request host and static base URL, so each is
+# built once; callers share the returned dict and must not mutate it
+@lru_cache(maxsize=32)
+def _company_introduction_response(request_host: Optional[str]) -> Dict[str, Any]:
+    return {
+        "type": "flex_message",
+        "content": BusinessTemplates.company_introduction_with_homepage(request_host).contents.as_json_dict(),
+        "alt_text": "VibPath 公司介紹"
+    }
+
+
+@lru_cache(maxsize=32)
+def _product_catalog_response(request_host: Optional[str]) -> Dict[str, Any]:
+    return {
+        "type": "flex_message",
+        "content": BusinessTemplates.frequency_services_carousel(request_host).contents.as_json_dict(),
+        "alt_text": "VibPath 商品目錄"
+    }
+
+
+@lru_cache(maxsize=1)
+def _service_menu_response() -> Dict[str, Any]:
+    return {
+        "type": "flex_message",
+        "content": FlexMessageTemplates.service_menu().contents.as_json_dict(),
+        "alt_text": "VibPath 服務選單"
+    }
+
+
+@lru_cache(maxsize=1)
+def _manual_download_response() -> Dict[str, Any]:
+    base = (settings.static_base_url or "").rstrip('/')
+    return {
+        "type": "flex_message",
+        "content": BubbleTemplates.pdf_download("生命頻率指南", "下載指南", f"{base}/images/manual_frequency_guide.pdf"),
+        "alt_text": "生命頻率指南下載"
+    }
+
+
+@lru_cache(maxsize=1)
+def _detection_app_response() -> Dict[str, Any]:
+    static_base = (settings.static_base_url or "").rstrip('/')
+    return {
+        "type": "flex_message",
+        "content": BubbleTemplates.app_download(
+            image_url=f"{static_base}/images/app/android.jpg",
+            title="Android 檢測 APP",
+            app_name="Ultimate EMF Detector",
+            description="可檢測機器發出的電磁場訊號，確認設備是否正常運作",
+            button_label="前往 Google Play",
+            store_url="https://play.google.com/store/apps/details?id=com.mreprogramming.ultimateemfdetector"
+        ),
+        "alt_text": "Android 檢測 APP 下載"
+    }
 
 
 def show_company_introduction(request_host: Optional[str] = None) -> Dict[str, Any]:
@@ -17,14 +116,7 @@ def show_company_introduction(request_host: Optional[str] = None) -> Dict[str, A
     Returns:
         Dict with flex_message type and content
     """
-    from ..templates.custom_templates import BusinessTemplates
-    flex_msg = BusinessTemplates.company_introduction_with_homepage(request_host)
-
-    return {
-        "type": "flex_message",
-        "content": flex_msg.contents.as_json_dict(),  # Convert to dict for serialization
-        "alt_text": "VibPath 公司介紹"
-    }
+    return _company_introduction_response(request_host)
 
 
 def show_product_catalog(request_host: Optional[str] = None) -> Dict[str, Any]:
@@ -37,14 +129,7 @@ def show_product_catalog(request_host: Optional[str] = None) -> Dict[str, Any]:
     Returns:
         Dict with flex_message type and content
     """
-    from ..templates.custom_templates import BusinessTemplates
-    flex_msg = BusinessTemplates.frequency_services_carousel(request_host)
-
-    return {
-        "type": "flex_message",
-        "content": flex_msg.contents.as_json_dict(),  # Convert to dict for serialization
-        "alt_text": "VibPath 商品目錄"
-    }
+    return _product_catalog_response(request_host)
 
 
 def show_service_menu(request_host: Optional[str] = None) -> Dict[str, Any]:
@@ -57,14 +142,7 @@ def show_service_menu(request_host: Optional[str] = None) -> Dict[str, Any]:
     Returns:
         Dict with flex_message type and content
     """
-    from ..templates.flex_templates import FlexMessageTemplates
-    flex_msg = FlexMessageTemplates.service_menu()
-
-    return {
-        "type": "flex_message",
-        "content": flex_msg.contents.as_json_dict(),  # Convert to dict for serialization
-        "alt_text": "VibPath 服務選單"
-    }
+    return _service_menu_response()
 
 
 def show_manual_download(product_type: str = "all") -> Dict[str, Any]:
@@ -82,14 +160,7 @@ def show_manual_download(product_type: str = "all") -> Dict[str, Any]:
     Returns:
         Dict with flex_message type and manual download card
     """
-    from ..config.env_config import settings
-    base = (settings.static_base_url or "").rstrip('/')
-
-    return {
-        "type": "flex_message",
-        "content": BubbleTemplates.pdf_download("生命頻率指南", "下載指南", f"{base}/images/manual_frequency_guide.pdf"),
-        "alt_text": "生命頻率指南下載"
-    }
+    return _manual_download_response()
 
 
 def show_detection_apps() -> Dict[str, Any]:
@@ -101,23 +172,7 @@ def show_detection_apps() -> Dict[str, Any]:
         Dict with flex_message type and Android app download card
         (iOS app is currently unavailable)
     """
-    from ..config.env_config import settings
-    static_base = (settings.static_base_url or "").rstrip('/')
-
-    bubble_android = BubbleTemplates.app_download(
-        image_url=f"{static_base}/images/app/android.jpg",
-        title="Android 檢測 APP",
-        app_name="Ultimate EMF Detector",
-        description="可檢測機器發出的電磁場訊號，確認設備是否正常運作",
-        button_label="前往 Google Play",
-        store_url="https://play.google.com/store/apps/details?id=com.mreprogramming.ultimateemfdetector"
-    )
-
-    return {
-        "type": "flex_message",
-        "content": bubble_android,
-        "alt_text": "Android 檢測 APP 下載"
-    }
+    return _detection_app_response()
 
 
 def show_product_details(product_type: str) -> Dict[str, Any]:
@@ -130,38 +185,7 @@ def show_product_details(product_type: str) -> Dict[str, Any]:
     Returns:
         Dict with text response containing product details
     """
-    from ..handlers.postback_handler import postback_handler
-
-    product_map = {
-        "7_83hz": "explain_7_83hz",
-        "7.83hz": "explain_7_83hz",
-        "舒曼波": "explain_7_83hz",
-        "13freq": "explain_13Freq",
-        "13頻": "explain_13Freq",
-        "脈輪": "explain_13Freq",
-        "40hz": "explain_40hz",
-        "gamma": "explain_40hz",
-        "γ波": "explain_40hz",
-        "double_freq": "explain_double_freq",
-        "雙頻": "explain_double_freq",
-        "alpha": "explain_double_freq",
-        "theta": "explain_double_freq",
-        "pulse_gen": "explain_pulse_gen",
-        "客製頻率": "explain_pulse_gen",
-        "composite_freq": "explain_composite_freq",
-        "複合式": "explain_composite_freq",
-        "複合式頻率": "explain_composite_freq",
-        "0.5hz": "explain_composite_freq",
-        "ten_freq": "explain_ten_freq",
-        "十頻": "explain_ten_freq",
-        "十頻儀": "explain_ten_freq",
-        "整合十頻": "explain_ten_freq",
-        "整合十頻機": "explain_ten_freq",
-        "10頻": "explain_ten_freq",
-        "pemf": "explain_ten_freq",
-    }
-
-    explanation_key = product_map.get(product_type.lower())
+    explanation_key = PRODUCT_EXPLANATION_KEYS.get(product_type.lower())
     if explanation_key:
         explanation = postback_handler.get_explanation(explanation_key)
         if explanation:
@@ -170,18 +194,15 @@ def show_product_details(product_type: str) -> Dict[str, Any]:
                 "content": explanation
             }
 
-    return {
-        "type": "text",
-        "content": "抱歉，找不到該產品的詳細資訊。請使用選單查看我們的產品。"
-    }
+    return PRODUCT_NOT_FOUND_RESPONSE
 
 
-# Tool registry for Google ADK Agent
-AI_TOOLS = {
+# Tool registry for Google ADK Agent (read-only view)
+AI_TOOLS = MappingProxyType({
     "show_company_introduction": show_company_introduction,
     "show_product_catalog": show_product_catalog,
     "show_service_menu": show_service_menu,
     "show_product_details": show_product_details,
     "show_detection_apps": show_detection_apps,
     "show_manual_download": show_manual_download
-}
\ No newline at end of file
+})
\ No newline at end of file
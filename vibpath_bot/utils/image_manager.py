@@ -4,11 +4,15 @@ Handles image upload, storage, and URL generation for Flex Messages.
 """
 import os
 import logging
+import uuid
 from typing import Optional, Dict, Any
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Upload subdirectories; anything else is stored under temp
+IMAGE_CATEGORIES = ("packages", "business", "temp")
+
 
 class ImageManager:
     """Manages image storage and URL generation for LINE Bot"""
@@ -25,14 +29,8 @@ class ImageManager:
 
     def ensure_directories(self):
         """Ensure upload directories exist"""
-        directories = [
-            f"{self.base_upload_dir}/packages",
-            f"{self.base_upload_dir}/business",
-            f"{self.base_upload_dir}/temp"
-        ]
-
-        for directory in directories:
-            os.makedirs(directory, exist_ok=True)
+        for category in IMAGE_CATEGORIES:
+            os.makedirs(f"{self.base_upload_dir}/{category}", exist_ok=True)
 
     def save_uploaded_image(self, image_data: bytes, filename: str, category: str = "temp") -> Optional[str]:
         """
@@ -47,13 +45,13 @@ class ImageManager:
             str: Saved file path or None if failed
         """
         try:
-            # Generate unique filename
+            # Generate unique filename (random suffix so same-second uploads don't collide)
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             name, ext = os.path.splitext(filename)
-            unique_filename = f"{timestamp}_{name}{ext}"
+            unique_filename = f"{timestamp}_{uuid.uuid4().hex[:8]}_{name}{ext}"
 
             # Ensure valid category
-            if category not in ["packages", "business", "temp"]:
+            if category not in IMAGE_CATEGORIES:
                 category = "temp"
 
             file_path = f"{self.base_upload_dir}/{category}/{unique_filename}"
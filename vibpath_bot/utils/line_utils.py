@@ -4,14 +4,24 @@ LINE Bot utility functions including loading animations and messaging helpers.
 """
 import logging
 import os
+from functools import lru_cache
+from typing import Optional
 import aiohttp
 from linebot import AsyncLineBotApi
 
 logger = logging.getLogger(__name__)
 
+LOADING_ANIMATION_URL = "https://api.line.me/v2/bot/chat/loading/start"
+
 # Global variable to store LINE Bot API instance
 line_bot_api_instance: AsyncLineBotApi = None
 
+# Shared aiohttp session (owned by the app lifespan) so API calls reuse connections
+http_session: Optional[aiohttp.ClientSession] = None
+
+# Users with a loading animation request currently in flight
+_loading_in_flight: set = set()
+
 
 def set_line_bot_api(api_instance):
     """Set LINE Bot API instance for loading animation and other utilities"""
@@ -20,6 +30,31 @@ def set_line_bot_api(api_instance):
     logger.info("LINE Bot API instance set successfully")
 
 
+@lru_cache(maxsize=1)
+def _loading_headers(channel_access_token: str) -> dict:
+    """Request headers for the loading API, built once per access token"""
+    return {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {channel_access_token}"
+    }
+
+
+def set_http_session(session: aiohttp.ClientSession):
+    """Set the shared aiohttp session used for direct LINE API calls"""
+    global http_session
+    http_session = session
+
+
+async def _post_loading_start(session: aiohttp.ClientSession, url: str, data: dict, headers: dict, user_id: str):
+    """POST a loading animation request and log the outcome"""
+    async with session.post(url, json=data, headers=headers) as response:
+        if response.status == 200:
+            logger.info(f"Loading animation started successfully for user {user_id}")
+        else:
+            error_text = await response.text()
+            logger.error(f"Failed to start loading animation: {response.status} - {error_text}")
+
+
 async def display_loading_animation(user_id: str, loading_seconds: int = 20):
     """
     Displays a loading animation in the chat using direct API call.
@@ -35,33 +70,37 @@ async def display_loading_animation(user_id: str, loading_seconds: int = 20):
         logger.warning("Channel access token not found, skipping loading animation.")
         return
 
+    # Burst messages from one user share the request already in flight
+    if user_id in _loading_in_flight:
+        logger.debug(f"Loading animation already in flight for user {user_id}, skipping.")
+        return
+
     # Ensure loading_seconds is within the allowed range (5-60 seconds)
     validated_seconds = max(5, min(loading_seconds, 60))
 
+    _loading_in_flight.add(user_id)
     try:
         logger.info(f"Displaying loading animation for user {user_id} for {validated_seconds} seconds.")
 
         # Direct API call to LINE Messaging API
-        url = "https://api.line.me/v2/bot/chat/loading/start"
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {channel_access_token}"
-        }
+        url = LOADING_ANIMATION_URL
+        headers = _loading_headers(channel_access_token)
         data = {
             "chatId": user_id,
             "loadingSeconds": validated_seconds
         }
 
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, json=data, headers=headers) as response:
-                if response.status == 200:
-                    logger.info(f"Loading animation started successfully for user {user_id}")
-                else:
-                    error_text = await response.text()
-                    logger.error(f"Failed to start loading animation: {response.status} - {error_text}")
+        if http_session is not None and not http_session.closed:
+            await _post_loading_start(http_session, url, data, headers, user_id)
+        else:
+            # No shared session yet (e.g. outside the app lifespan)
+            async with aiohttp.ClientSession() as session:
+                await _post_loading_start(session, url, data, headers, user_id)
 
     except Exception as e:
         logger.error(f"An unexpected error occurred while displaying loading animation: {e}")
+    finally:
+        _loading_in_flight.discard(user_id)
 
 
 def validate_line_api():
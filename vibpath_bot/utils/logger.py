@@ -2,8 +2,11 @@
 Centralized Logging Configuration for VibPath LINE Bot
 Provides consistent logging across all modules
 """
+import atexit
 import logging
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener
 from typing import Optional
 
 
@@ -20,15 +23,29 @@ class ColoredFormatter(logging.Formatter):
         'RESET': '\033[0m'        # Reset
     }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Level labels are built once; colors only when stdout is a terminal
+        use_color = sys.stdout.isatty()
+        self._level_labels = {
+            level: f"{color}{level:8}{self.COLORS['RESET']}" if use_color else f"{level:8}"
+            for level, color in self.COLORS.items()
+            if level != 'RESET'
+        }
+
     def format(self, record):
         """Format log record with colors"""
-        if record.levelname in self.COLORS:
-            record.levelname = (
-                f"{self.COLORS[record.levelname]}"
-                f"{record.levelname:8}"
-                f"{self.COLORS['RESET']}"
-            )
-        return super().format(record)
+        label = self._level_labels.get(record.levelname)
+        if label is None:
+            return super().format(record)
+
+        # Restore the level name so other handlers see the original record
+        levelname = record.levelname
+        record.levelname = label
+        try:
+            return super().format(record)
+        finally:
+            record.levelname = levelname
 
 
 def setup_logger(
@@ -65,7 +82,7 @@ def setup_logger(
         datefmt='%Y-%m-%d %H:%M:%S'
     )
     console_handler.setFormatter(console_format)
-    logger.addHandler(console_handler)
+    handlers = [console_handler]
 
     # File handler (if specified)
     if log_file:
@@ -76,26 +93,40 @@ def setup_logger(
             datefmt='%Y-%m-%d %H:%M:%S'
         )
         file_handler.setFormatter(file_format)
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
+
+    # Callers only enqueue records; a listener thread does the console/file I/O
+    queue_handler = QueueHandler(queue.SimpleQueue())
+    listener = QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    logger.addHandler(queue_handler)
 
     return logger
 
 
-def get_logger(name: str) -> logging.Logger:
+def get_logger(name: str, level: Optional[str] = None) -> logging.Logger:
     """
-    Get or create a logger with default configuration
+    Get a logger that writes through the shared "vibpath_bot" handlers
+
+    Loggers under "vibpath_bot" need no handlers of their own; records
+    propagate to the application logger, so each record is formatted once.
 
     Args:
         name: Logger name (usually __name__)
+        level: Optional log level override for this logger
 
     Returns:
         Logger instance
     """
-    return setup_logger(name)
+    logger = logging.getLogger(name)
+    if level:
+        logger.setLevel(getattr(logging, level.upper()))
+    return logger
 
 
-# Application-wide logger instances
+# Application-wide logger instances (only the root "vibpath_bot" logger has handlers)
 app_logger = setup_logger("vibpath_bot", level="INFO")
-ai_logger = setup_logger("vibpath_bot.ai", level="DEBUG")
-db_logger = setup_logger("vibpath_bot.db", level="INFO")
-webhook_logger = setup_logger("vibpath_bot.webhook", level="INFO")
+ai_logger = get_logger("vibpath_bot.ai", level="DEBUG")
+db_logger = get_logger("vibpath_bot.db", level="INFO")
+webhook_logger = get_logger("vibpath_bot.webhook", level="INFO")
@@ -3,8 +3,10 @@ User Preferences Cache with TTL (Time To Live)
 Reduces MongoDB queries by caching frequently accessed user preferences
 """
 import time
-from typing import Optional, Dict
+from collections import OrderedDict
+from typing import Optional, Tuple
 from threading import Lock
+from vibpath_bot.utils.logger import db_logger as logger
 
 
 class UserPreferencesCache:
@@ -13,15 +15,19 @@ class UserPreferencesCache:
     Thread-safe implementation
     """
 
-    def __init__(self, ttl_seconds: int = 600):
+    def __init__(self, ttl_seconds: int = 600, maxsize: int = 10_000):
         """
         Initialize cache
 
         Args:
             ttl_seconds: Time to live in seconds (default: 600 = 10 minutes)
+            maxsize: Maximum number of entries; the oldest are evicted beyond this
         """
         self.ttl_seconds = ttl_seconds
-        self._cache: Dict[str, dict] = {}
+        self.maxsize = maxsize
+        self.evictions = 0
+        # user_id -> (ai_reply_enabled, monotonic timestamp), oldest entry first
+        self._cache: OrderedDict[str, Tuple[bool, float]] = OrderedDict()
         self._lock = Lock()
 
     def get(self, user_id: str) -> Optional[bool]:
@@ -35,19 +41,19 @@ class UserPreferencesCache:
             bool: AI reply status if found and not expired, None otherwise
         """
         with self._lock:
-            if user_id not in self._cache:
+            cache_entry = self._cache.get(user_id)
+            if cache_entry is None:
                 return None
 
-            cache_entry = self._cache[user_id]
-            current_time = time.time()
+            ai_reply_enabled, timestamp = cache_entry
 
             # Check if cache entry has expired
-            if current_time - cache_entry["timestamp"] > self.ttl_seconds:
+            if time.monotonic() - timestamp > self.ttl_seconds:
                 # Cache expired, remove it
                 del self._cache[user_id]
                 return None
 
-            return cache_entry["ai_reply_enabled"]
+            return ai_reply_enabled
 
     def set(self, user_id: str, ai_reply_enabled: bool):
         """
@@ -58,10 +64,14 @@ class UserPreferencesCache:
             ai_reply_enabled: AI reply status
         """
         with self._lock:
-            self._cache[user_id] = {
-                "ai_reply_enabled": ai_reply_enabled,
-                "timestamp": time.time()
-            }
+            # Re-insert at the end so entries stay ordered by timestamp
+            self._cache.pop(user_id, None)
+            self._cache[user_id] = (ai_reply_enabled, time.monotonic())
+
+            # Bound memory under bursts of one-time users
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+                self.evictions += 1
 
     def invalidate(self, user_id: str):
         """
@@ -72,37 +82,41 @@ class UserPreferencesCache:
             user_id: LINE user ID
         """
         with self._lock:
-            if user_id in self._cache:
-                del self._cache[user_id]
-                print(f"🗑️  Cache invalidated for user {user_id}")
+            removed = self._cache.pop(user_id, None) is not None
+
+        # Log outside the lock so handler I/O never blocks other cache calls
+        if removed:
+            logger.debug("Cache invalidated for user %s", user_id)
 
     def clear(self):
         """Clear all cache entries"""
         with self._lock:
             self._cache.clear()
-            print("🗑️  All cache cleared")
+        logger.info("All cache cleared")
 
     def get_stats(self) -> dict:
         """
         Get cache statistics
 
         Returns:
-            dict: Cache statistics including size and oldest entry age
+            dict: Cache statistics including size, oldest entry age and evictions
         """
         with self._lock:
             if not self._cache:
                 return {
                     "size": 0,
-                    "oldest_entry_age_seconds": 0
+                    "oldest_entry_age_seconds": 0,
+                    "evictions": self.evictions
                 }
 
-            current_time = time.time()
-            oldest_timestamp = min(entry["timestamp"] for entry in self._cache.values())
+            current_time = time.monotonic()
+            _, oldest_timestamp = next(iter(self._cache.values()))
             oldest_age = current_time - oldest_timestamp
 
             return {
                 "size": len(self._cache),
-                "oldest_entry_age_seconds": int(oldest_age)
+                "oldest_entry_age_seconds": int(oldest_age),
+                "evictions": self.evictions
             }
 
     def cleanup_expired(self):
@@ -111,19 +125,21 @@ class UserPreferencesCache:
         This is called automatically during get(), but can be called manually for maintenance
         """
         with self._lock:
-            current_time = time.time()
-            expired_keys = [
-                user_id
-                for user_id, entry in self._cache.items()
-                if current_time - entry["timestamp"] > self.ttl_seconds
-            ]
-
-            for user_id in expired_keys:
-                del self._cache[user_id]
+            current_time = time.monotonic()
+            expired_count = 0
+
+            # Entries are ordered by timestamp, so stop at the first fresh one
+            while self._cache:
+                _, timestamp = next(iter(self._cache.values()))
+                if current_time - timestamp <= self.ttl_seconds:
+                    break
+                self._cache.popitem(last=False)
+                expired_count += 1
 
-            if expired_keys:
-                print(f"🗑️  Cleaned up {len(expired_keys)} expired cache entries")
+        if expired_count:
+            logger.debug("Cleaned up %d expired cache entries", expired_count)
 
 
-# Global cache instance with 10 minutes TTL
-user_preferences_cache = UserPreferencesCache(ttl_seconds=600)
+# Global cache instance with 30 seconds TTL: reads are cache-first, so this bounds
+# how long other instances keep serving a preference changed elsewhere
+user_preferences_cache = UserPreferencesCache(ttl_seconds=30)